@@ -0,0 +1,157 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import numpy as np
+
+import param as PARAM
+import dataTypes
+import coveragePlanner
+from dataTypes import geoLoc, geoCircle, geoRect
+from rhinoLoc import RhinoLoc
+from droneSim import SimDrone
+from drones import LawnmowerSearch
+
+# Micro-benchmarks of the code paths run on every sense request or search step.
+#   python benchmark.py                           run all benchmarks and print the results
+#   python benchmark.py --save baseline.json      ... and save them as a baseline
+#   python benchmark.py --compare baseline.json   ... and flag the ones slower than the baseline (exit code 1)
+# A benchmark is timed in samples of many calls (long enough for the clock resolution), percentiles are those
+# of the per-call time of the samples.
+
+SAMPLE_TIME = 0.005 # Target duration of one sample [s]
+SAMPLE_NBR = 100
+HERD_SIZES = (10, 100, 1000, 10000)
+
+def randomLocs(n, rng, alt=None):
+    return [geoLoc(rng.uniform(PARAM.limit_south, PARAM.limit_north), rng.uniform(PARAM.limit_west, PARAM.limit_east), alt) for _ in range(n)]
+
+def benchmarks():
+    # name -> (geometry mode, arguments, fn): fn is called on each of the arguments in turn
+    rng = random.Random(0)
+    cases = {}
+
+    for mode in ("ellipsoid", "flat"):
+        pairs = list(zip(randomLocs(100, rng, PARAM.takeOffAltitude), randomLocs(100, rng, 0)))
+        cases[f"geoLoc.distTo[{mode}]"] = (mode, pairs, lambda p: p[0].distTo(p[1]))
+        cases[f"geoLoc.distTo(hzOnly)[{mode}]"] = (mode, pairs, lambda p: p[0].distTo(p[1], hzOnly=True))
+        offsets = [(loc, rng.uniform(-500, 500), rng.uniform(-500, 500)) for loc in randomLocs(100, rng, PARAM.takeOffAltitude)]
+        cases[f"geoLoc.offset[{mode}]"] = (mode, offsets, lambda o: o[0].offset(o[1], o[2]))
+        triples = []
+        for rhino in randomLocs(100, rng):
+            centers = [rhino.offset(rng.uniform(-300, 300), rng.uniform(-300, 300)) for _ in range(3)]
+            triples.append([geoCircle(c, c.distTo(rhino, hzOnly=True)) for c in centers])
+        cases[f"geoCircle.intersection3circle[{mode}]"] = (mode, triples, lambda t: t[0].intersection3circle(t[1], t[2]))
+
+    positions = randomLocs(1000, rng, PARAM.takeOffAltitude)
+    for n in HERD_SIZES:
+        rhinoLoc = RhinoLoc(n, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east), seed=n)
+        cases[f"RhinoLoc.senseRhino[n={n}]"] = (PARAM.geometryMode, positions, rhinoLoc.senseRhino)
+        cases[f"RhinoLoc.distance_to_closest_rhino[n={n}]"] = (PARAM.geometryMode, positions, rhinoLoc.distance_to_closest_rhino) # Full scan reference of the grid query
+
+    limits = geoRect.fromParam()
+    drone = SimDrone(1)
+    def coldPlan(radius):
+        coveragePlanner._candidates.cache_clear()
+        return coveragePlanner.plan(limits, radius, start=drone.get_position())
+    cases["coveragePlanner.plan(foundThreshold, cold)"] = (PARAM.geometryMode, [PARAM.foundThreshold], coldPlan)
+    cases["coveragePlanner.plan(sensorRange, cold)"] = (PARAM.geometryMode, [PARAM.sensorRange], coldPlan)
+    cases["LawnmowerSearch.grid"] = (PARAM.geometryMode, [LawnmowerSearch(drone, senseClient=object())], lambda s: s.grid())
+    cases["TriangulationSearch.grid"] = (PARAM.geometryMode, [None], lambda _: coveragePlanner.plan(limits, PARAM.sensorRange, start=drone.get_position())) # As in TriangulationSearch.search()
+
+    request = {"drone_id": 1}
+    response = {"sense_status": {"state": "in_range", "distance": 123.456789}}
+    cases["json.encode(/sense request)"] = (None, [request], lambda r: json.dumps(r).encode())
+    cases["json.decode(/sense request)"] = (None, [json.dumps(request).encode()], json.loads)
+    cases["json.encode(/sense response)"] = (None, [response], lambda r: json.dumps(r).encode())
+    cases["json.decode(/sense response)"] = (None, [json.dumps(response).encode()], json.loads)
+    return cases
+
+def measure(args, fn):
+    # Calibrate the number of calls per sample, then time SAMPLE_NBR samples
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(loops):
+            fn(args[i % len(args)])
+        duration = time.perf_counter() - start
+        if duration >= SAMPLE_TIME:
+            break
+        loops *= 2 if duration == 0 else max(2, int(SAMPLE_TIME / duration))
+    samples = np.empty(SAMPLE_NBR)
+    for k in range(SAMPLE_NBR):
+        start = time.perf_counter()
+        for i in range(loops):
+            fn(args[i % len(args)])
+        samples[k] = (time.perf_counter() - start) / loops
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"ops": float(1 / samples.mean()), "mean": float(samples.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99), "loops": loops}
+
+def run(pattern=None):
+    results = {}
+    foundThreshold = PARAM.foundThreshold
+    try:
+        for name, (mode, args, fn) in benchmarks().items():
+            if pattern and pattern not in name:
+                continue
+            dataTypes.setGeometryMode(mode or PARAM.geometryMode)
+            # Senses never claim a rhino, so that the herd stays the same over all iterations
+            PARAM.foundThreshold = 0 if name.startswith("RhinoLoc.") else foundThreshold
+            results[name] = measure(args, fn)
+            printResult(name, results[name])
+    finally:
+        PARAM.foundThreshold = foundThreshold
+        dataTypes.setGeometryMode(PARAM.geometryMode)
+    return results
+
+def formatTime(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:7.2f}{unit}"
+    return f"{seconds / 1e-9:7.0f}ns"
+
+def printResult(name, result, comment=""):
+    print(f"{name:50s} {result['ops']:12,.0f} ops/s  p50 {formatTime(result['p50'])}  p95 {formatTime(result['p95'])}  p99 {formatTime(result['p99'])}{comment}")
+
+def compare(results, baseline, threshold):
+    # A benchmark regresses if its median time per call grew by more than threshold (0.2 = 20%)
+    regressions = []
+    print(f"\nComparison with baseline ({baseline['meta']['date']}, threshold {threshold:.0%})")
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            printResult(name, result, "  (new)")
+            continue
+        change = result["p50"] / baseline["results"][name]["p50"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        printResult(name, result, f"  {change:+7.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    print(f"{len(regressions)} regression(s)" + (": " + ", ".join(regressions) if regressions else ""))
+    return regressions
+
+def save(results, path):
+    meta = {"date": time.strftime('%Y-%m-%d %H:%M:%S'), "python": platform.python_version(), "numpy": np.__version__, "machine": platform.platform(), "geometryMode": PARAM.geometryMode}
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Baseline saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the geometry and sensing hot paths")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown of the median flagged as a regression (default 0.2)")
+    parser.add_argument("--filter", metavar="TEXT", help="only run the benchmarks whose name contains TEXT")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run(args.filter)
+    if args.save:
+        save(results, args.save)
+    if baseline is not None and compare(results, baseline, args.threshold):
+        sys.exit(1)
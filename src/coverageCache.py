@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoLoc, geoRect, GeoArray
+
+class CoverageCache:
+    # Raster of the map recording where no unfound rhino can be, built from the sense readings of one drone
+    # or of a whole swarm (the cache is thread safe). Rhinos never move and are only ever removed from the
+    # game, so a cleared cell stays cleared:
+    #   - out_of_range clears the sensor disk
+    #   - in_range / found at distance d clear the disk of radius d (the reading is the closest unfound rhino,
+    #     a found rhino is claimed by the reading itself)
+    # Only cells entirely inside a disk are cleared, a waypoint is covered if every cell touching its disk
+    # is cleared. Both tests only look at the bounding box of the disk, whatever the number of readings.
+    def __init__(self, limits : geoRect = None, cellSize=PARAM.coverageCacheCellSize):
+        self.limits = limits or geoRect.fromParam()
+        self.cellSize = cellSize
+        self.origin = geoLoc(self.limits.south, self.limits.west)
+        self.nx = max(1, int(np.ceil(self.limits.width() / cellSize)))
+        self.ny = max(1, int(np.ceil(self.limits.height() / cellSize)))
+        self.cleared = np.zeros((self.ny, self.nx), dtype=bool)
+        self.halfDiag = cellSize / 2**0.5 # A cell is entirely inside a disk if its centre is this much inside
+        self.lock = threading.Lock()
+        self.found = [] # Positions of the drone when it found a rhino
+        self.readings = 0
+
+    def _window(self, position : geoLoc, radius):
+        # Slices of the raster around the disk and the distance of their cell centres to the disk centre.
+        # Cells outside the map are never part of a window: they hold no rhino.
+        east, north = GeoArray(position.lat, position.lon).toENU(self.origin)
+        east, north = float(east[0]), float(north[0])
+        reach = radius + self.halfDiag
+        x0, x1 = max(0, int((east - reach) // self.cellSize)), min(self.nx, int((east + reach) // self.cellSize) + 1)
+        y0, y1 = max(0, int((north - reach) // self.cellSize)), min(self.ny, int((north + reach) // self.cellSize) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return None, None
+        xs = (np.arange(x0, x1) + 0.5) * self.cellSize - east
+        ys = (np.arange(y0, y1) + 0.5) * self.cellSize - north
+        return (slice(y0, y1), slice(x0, x1)), np.hypot(xs[np.newaxis, :], ys[:, np.newaxis])
+
+    def clear(self, position : geoLoc, radius):
+        window, dist = self._window(position, radius)
+        if window is not None:
+            with self.lock:
+                self.cleared[window] |= dist + self.halfDiag <= radius
+
+    def record(self, position : geoLoc, result):
+        # result is the sense_status returned by the game server for a reading taken at position
+        if result["state"] == "out_of_range":
+            self.clear(position, PARAM.sensorRange)
+        else:
+            self.clear(position, result["distance"])
+        with self.lock:
+            self.readings += 1
+            if result["state"] == "found":
+                self.found.append(position)
+
+    def is_covered(self, position : geoLoc, radius):
+        # True if no unfound rhino can be within radius of position, i.e. sensing there is pointless
+        window, dist = self._window(position, radius)
+        if window is None:
+            return True
+        with self.lock:
+            return bool(np.all(self.cleared[window][dist - self.halfDiag <= radius]))
+
+    def found_positions(self):
+        with self.lock:
+            return GeoArray.from_locs(self.found)
+
+    def cleared_fraction(self):
+        with self.lock:
+            return float(self.cleared.mean())
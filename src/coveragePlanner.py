@@ -0,0 +1,79 @@
+import math
+import functools
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoLoc, geoRect, GeoArray
+
+# Coverage path planning: waypoints such that every point of an area is within a given radius of at
+# least one waypoint (i.e. sensing at every waypoint covers the whole area), ordered as a serpentine.
+#   - "square": square lattice with spacing radius * sqrt(2) (the original lawnmower grid)
+#   - "hex": hexagonal lattice, rows 1.5 * radius apart and points radius * sqrt(3) apart within a row.
+#     Each waypoint covers 2.6 * radius^2 instead of 2 * radius^2, i.e. ~23% fewer waypoints.
+
+def _lattice(width, height, radius, pattern):
+    # Rows of points (local x, y [m]) covering the rectangle [0, width] x [0, height], centred on it.
+    # Every point covers the cell around it (the inscribed square or hexagon of its disk), the cells
+    # tile the plane and every cell overlapping the rectangle is kept.
+    if pattern == "square":
+        dx = dy = radius * math.sqrt(2)
+        rowNbr = max(1, math.ceil(height / dy))
+    elif pattern == "hex":
+        dx = radius * math.sqrt(3)
+        dy = 1.5 * radius
+        # Pointy-top hexagons: a row fully covers a band of height radius, neighbouring rows cover the gaps
+        rowNbr = max(1, math.ceil((height - radius) / dy) + 1)
+    else:
+        raise ValueError(f"Unknown coverage pattern: {pattern}")
+
+    ys = height / 2 + dy * (np.arange(rowNbr) - (rowNbr - 1) / 2)
+    rows = []
+    for k, y in enumerate(ys):
+        # Keep the points whose cell [x - dx/2, x + dx/2] overlaps [0, width]
+        phase = width / 2 + (dx / 2 if pattern == "hex" and k % 2 == 1 else 0)
+        first = math.floor((-dx / 2 - phase) / dx) + 1
+        last = math.ceil((width + dx / 2 - phase) / dx) - 1
+        xs = phase + dx * np.arange(first, last + 1)
+        rows.append((xs, np.full(xs.size, y)))
+    return rows
+
+def _serpentine(rows, reverseRows, reverseFirst):
+    rows = rows[::-1] if reverseRows else rows
+    xs, ys = [], []
+    for k, (x, y) in enumerate(rows):
+        if (k % 2 == 1) != reverseFirst:
+            x = x[::-1]
+        xs.append(x)
+        ys.append(y)
+    return np.concatenate(xs), np.concatenate(ys)
+
+@functools.lru_cache(maxsize=64)
+def _candidates(north, south, west, east, radius, pattern):
+    # All serpentine variants (rows along east or north, starting from any of the 4 corners) in local
+    # east/north coordinates relative to the south-west corner, with their path length.
+    limits = geoRect(north, south, west, east)
+    width, height = limits.width(), limits.height()
+    candidates = []
+    for transposed in (False, True):
+        rows = _lattice(height, width, radius, pattern) if transposed else _lattice(width, height, radius, pattern)
+        for reverseRows in (False, True):
+            for reverseFirst in (False, True):
+                a, b = _serpentine(rows, reverseRows, reverseFirst)
+                east, north = (b, a) if transposed else (a, b)
+                length = float(np.sum(np.hypot(np.diff(east), np.diff(north))))
+                candidates.append((east, north, length))
+    return candidates
+
+def plan(limits : geoRect, radius, start : geoLoc = None, pattern=PARAM.coveragePattern, alt=PARAM.takeOffAltitude) -> GeoArray:
+    # Shortest of the serpentine variants, including the leg from start to the first waypoint.
+    # Plans are cached per limits, radius and pattern, only the choice of variant depends on start.
+    candidates = _candidates(limits.north, limits.south, limits.west, limits.east, float(radius), pattern)
+    origin = geoLoc(limits.south, limits.west)
+    if start is not None:
+        startEast, startNorth = GeoArray(start.lat, start.lon).toENU(origin)
+        startEast, startNorth = float(startEast[0]), float(startNorth[0])
+        cost = lambda c: c[2] + math.hypot(c[0][0] - startEast, c[1][0] - startNorth)
+    else:
+        cost = lambda c: c[2]
+    east, north, _ = min(candidates, key=cost)
+    return GeoArray.fromENU(east, north, origin, alt)
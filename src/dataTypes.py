@@ -1,7 +1,51 @@
 import math
+import numpy as np
 import pymap3d as pm
+import param as PARAM
+
+class flatEarth():
+    # Local tangent plane around a fixed origin (equirectangular projection with the WGS84 meridian and
+    # prime vertical radii of curvature at the origin). Maximum error against the ellipsoidal pymap3d
+    # results over the game map (~3 km x 2 km around its centre):
+    #   - horizontal distances: < 1 mm
+    #   - 3D distances: < 10 cm (earth curvature is ignored)
+    #   - offsets up to 3 km: < 10 cm horizontally. The altitude is alt + up, pymap3d additionally adds
+    #     the curvature drop of the tangent plane (up to 1 m at 3 km).
+    A = 6378137.0 # WGS84 semi-major axis [m]
+    E2 = 6.69437999014e-3 # WGS84 first eccentricity squared
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        sinLat = math.sin(math.radians(lat0))
+        w = math.sqrt(1 - self.E2 * sinLat**2)
+        self.mPerDegLat = math.radians(1) * self.A * (1 - self.E2) / w**3
+        self.mPerDegLon = math.radians(1) * self.A / w * math.cos(math.radians(lat0))
+
+    def toENU(self, lat, lon):
+        return (lon - self.lon0) * self.mPerDegLon, (lat - self.lat0) * self.mPerDegLat
+
+    def fromENU(self, east, north):
+        return self.lat0 + north / self.mPerDegLat, self.lon0 + east / self.mPerDegLon
+
+_flatEarth = None # Active flat earth backend, None when using the ellipsoidal pymap3d computations
+
+def setGeometryMode(mode):
+    # "ellipsoid": exact pymap3d conversions, "flat": local tangent plane around the map centre
+    global _flatEarth
+    if mode == "flat":
+        _flatEarth = flatEarth((PARAM.limit_north + PARAM.limit_south) / 2, (PARAM.limit_east + PARAM.limit_west) / 2)
+    elif mode == "ellipsoid":
+        _flatEarth = None
+    else:
+        raise ValueError(f"Unknown geometry mode: {mode}")
+
+def getGeometryMode():
+    return "ellipsoid" if _flatEarth is None else "flat"
 
 class geoLoc():
+    __slots__ = ("lat", "lon", "alt")
+
     def __init__(self, lat, lon, alt=None):
         self.lat = float(lat)
         self.lon = float(lon)
@@ -10,6 +54,15 @@ class geoLoc():
         self.alt = alt
         self._validate()
 
+    @classmethod
+    def _trusted(cls, lat, lon, alt=None):
+        # Skips conversion and validation, for values coming from an already validated GeoArray
+        loc = cls.__new__(cls)
+        loc.lat = lat
+        loc.lon = lon
+        loc.alt = alt
+        return loc
+
     def _validate(self):
         if not (-90 <= self.lat <= 90):
             raise ValueError("Latitude must be between -90 and 90 degrees")
@@ -17,6 +70,10 @@ class geoLoc():
             raise ValueError("Longitude must be between -180 and 180 degrees")
         
     def offset(self, east, north, up=None):
+        if _flatEarth is not None:
+            lat = self.lat + north / _flatEarth.mPerDegLat
+            lon = self.lon + east / _flatEarth.mPerDegLon
+            return geoLoc(lat, lon, self.alt + (up or 0)) if self.alt else geoLoc(lat, lon)
         if self.alt:
             lat, lon, alt = pm.enu2geodetic(east, north, up or 0, self.lat, self.lon, self.alt)
             return geoLoc(lat, lon, alt)
@@ -25,6 +82,11 @@ class geoLoc():
             return geoLoc(lat, lon)
         
     def distTo(self, other : "geoLoc", hzOnly=False):
+        if _flatEarth is not None:
+            east = (other.lon - self.lon) * _flatEarth.mPerDegLon
+            north = (other.lat - self.lat) * _flatEarth.mPerDegLat
+            up = 0 if hzOnly else (other.alt or 0) - (self.alt or 0)
+            return math.sqrt(east**2 + north**2 + up**2)
         if hzOnly:
             _, _, srange = pm.geodetic2aer(self.lat, self.lon, 0, other.lat, other.lon, 0)
         else:
@@ -34,6 +96,150 @@ class geoLoc():
     def __str__(self):
         return f"Latitude: {self.lat:.6f}, Longitude: {self.lon:.6f}, Altitude: {self.alt:.1f}, Google Maps: https://www.google.com/maps/search/{self.lat:.6f},{self.lon:.6f}"
     
+class GeoArray():
+    # Struct of arrays holding many positions (lat, lon and optionally alt as NumPy arrays),
+    # with vectorized equivalents of the geoLoc operations.
+    def __init__(self, lat, lon, alt=None):
+        self.lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        self.lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        if alt is not None:
+            alt = np.broadcast_to(np.asarray(alt, dtype=float), self.lat.shape).copy()
+        self.alt = alt
+        self._validate()
+
+    def _validate(self):
+        if self.lat.shape != self.lon.shape:
+            raise ValueError("Latitude and longitude arrays must have the same shape")
+        if not np.all((-90 <= self.lat) & (self.lat <= 90)):
+            raise ValueError("Latitude must be between -90 and 90 degrees")
+        if not np.all((-180 <= self.lon) & (self.lon <= 180)):
+            raise ValueError("Longitude must be between -180 and 180 degrees")
+
+    @classmethod
+    def from_locs(cls, locs):
+        locs = list(locs)
+        alt = None
+        if locs and all(loc.alt is not None for loc in locs):
+            alt = [loc.alt for loc in locs]
+        return cls([loc.lat for loc in locs], [loc.lon for loc in locs], alt)
+
+    @classmethod
+    def fromENU(cls, east, north, origin : geoLoc, alt=None):
+        # Inverse of toENU(), horizontal only
+        if _flatEarth is not None:
+            x0, y0 = _flatEarth.toENU(origin.lat, origin.lon)
+            lat, lon = _flatEarth.fromENU(np.asarray(east) + x0, np.asarray(north) + y0)
+        else:
+            lat, lon, _ = pm.enu2geodetic(east, north, 0, origin.lat, origin.lon, 0)
+        return cls(lat, lon, alt)
+
+    def to_locs(self):
+        return list(self)
+
+    def __len__(self):
+        return self.lat.size
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return geoLoc._trusted(float(self.lat[key]), float(self.lon[key]), None if self.alt is None else float(self.alt[key]))
+        return GeoArray(self.lat[key], self.lon[key], None if self.alt is None else self.alt[key])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def toENU(self, origin : geoLoc):
+        # Horizontal local coordinates [m] of all positions relative to origin
+        if _flatEarth is not None:
+            return (self.lon - origin.lon) * _flatEarth.mPerDegLon, (self.lat - origin.lat) * _flatEarth.mPerDegLat
+        east, north, _ = pm.geodetic2enu(self.lat, self.lon, 0, origin.lat, origin.lon, 0)
+        return east, north
+
+    def ecef(self, hzOnly=False):
+        alt = 0 if hzOnly or self.alt is None else self.alt
+        return np.column_stack(pm.geodetic2ecef(self.lat, self.lon, alt))
+
+    def offset(self, east, north, up=None):
+        if _flatEarth is not None:
+            lat = self.lat + np.asarray(north) / _flatEarth.mPerDegLat
+            lon = self.lon + np.asarray(east) / _flatEarth.mPerDegLon
+            return GeoArray(lat, lon, None if self.alt is None else self.alt + (0 if up is None else np.asarray(up)))
+        if self.alt is not None:
+            lat, lon, alt = pm.enu2geodetic(east, north, 0 if up is None else up, self.lat, self.lon, self.alt)
+            return GeoArray(lat, lon, alt)
+        lat, lon, _ = pm.enu2geodetic(east, north, 0, self.lat, self.lon, 0)
+        return GeoArray(lat, lon)
+
+    def _alt(self, hzOnly):
+        return 0 if hzOnly or self.alt is None else self.alt
+
+    def distTo(self, other, hzOnly=False):
+        # One-to-many if other is a geoLoc, element-wise if other is a GeoArray of the same length
+        if isinstance(other, geoLoc):
+            other = GeoArray(other.lat, other.lon, other.alt)
+        return self._dist(self.lat, self.lon, self._alt(hzOnly), other.lat, other.lon, other._alt(hzOnly))
+
+    def pairwiseDist(self, other : "GeoArray", hzOnly=False):
+        # Distance matrix of shape (len(self), len(other))
+        return self._dist(self.lat[:, None], self.lon[:, None], np.asarray(self._alt(hzOnly))[..., None], other.lat[None, :], other.lon[None, :], np.asarray(other._alt(hzOnly))[None, ...])
+
+    @staticmethod
+    def _dist(latA, lonA, altA, latB, lonB, altB):
+        if _flatEarth is not None:
+            east = (lonB - lonA) * _flatEarth.mPerDegLon
+            north = (latB - latA) * _flatEarth.mPerDegLat
+            return np.sqrt(east**2 + north**2 + (altB - altA)**2)
+        # The ellipsoidal slant range of geoLoc.distTo is the norm of the ECEF difference
+        xa, ya, za = pm.geodetic2ecef(latA, lonA, altA)
+        xb, yb, zb = pm.geodetic2ecef(latB, lonB, altB)
+        return np.sqrt((xb - xa)**2 + (yb - ya)**2 + (zb - za)**2)
+
+class geoRect():
+    # Area bounded by two latitudes and two longitudes, e.g. the map limits or a search region
+    def __init__(self, north, south, west, east):
+        self.north = float(north)
+        self.south = float(south)
+        self.west = float(west)
+        self.east = float(east)
+        self._validate()
+
+    def _validate(self):
+        if self.south >= self.north:
+            raise ValueError("South limit must be below north limit")
+        if self.west >= self.east:
+            raise ValueError("West limit must be below east limit")
+
+    @classmethod
+    def fromParam(cls):
+        return cls(PARAM.limit_north, PARAM.limit_south, PARAM.limit_west, PARAM.limit_east)
+
+    def width(self):
+        return geoLoc(self.north, self.west).distTo(geoLoc(self.north, self.east))
+
+    def height(self):
+        return geoLoc(self.north, self.west).distTo(geoLoc(self.south, self.west))
+
+    def center(self):
+        return geoLoc((self.north + self.south) / 2, (self.west + self.east) / 2)
+
+    def contains(self, loc : geoLoc):
+        return self.south <= loc.lat <= self.north and self.west <= loc.lon <= self.east
+
+    def clamp(self, loc : geoLoc):
+        # Closest location inside the rectangle
+        return geoLoc(min(max(loc.lat, self.south), self.north), min(max(loc.lon, self.west), self.east), loc.alt)
+
+    def split(self, n):
+        # n equal strips cut across the longer side
+        if self.width() >= self.height():
+            edges = np.linspace(self.west, self.east, n + 1)
+            return [geoRect(self.north, self.south, w, e) for w, e in zip(edges[:-1], edges[1:])]
+        edges = np.linspace(self.north, self.south, n + 1)
+        return [geoRect(nth, sth, self.west, self.east) for nth, sth in zip(edges[:-1], edges[1:])]
+
+    def __str__(self):
+        return f"North: {self.north:.6f}, South: {self.south:.6f}, West: {self.west:.6f}, East: {self.east:.6f}"
+
 class geoCircle():
     def __init__(self, center: geoLoc, radius):
         self.center = center
@@ -49,9 +255,14 @@ class geoCircle():
         # using the method of trilateration.
         # WARNING: This function will return an intersection even if the circles do not intersect in a single point
 
-        x1, y1, _ = pm.geodetic2enu(self.center.lat, self.center.lon, 0, self.center.lat, self.center.lon, 0)
-        x2, y2, _ = pm.geodetic2enu(other1.center.lat, other1.center.lon, 0, self.center.lat, self.center.lon, 0)
-        x3, y3, _ = pm.geodetic2enu(other2.center.lat, other2.center.lon, 0, self.center.lat, self.center.lon, 0)
+        if _flatEarth is not None:
+            x1, y1 = _flatEarth.toENU(self.center.lat, self.center.lon)
+            x2, y2 = _flatEarth.toENU(other1.center.lat, other1.center.lon)
+            x3, y3 = _flatEarth.toENU(other2.center.lat, other2.center.lon)
+        else:
+            x1, y1, _ = pm.geodetic2enu(self.center.lat, self.center.lon, 0, self.center.lat, self.center.lon, 0)
+            x2, y2, _ = pm.geodetic2enu(other1.center.lat, other1.center.lon, 0, self.center.lat, self.center.lon, 0)
+            x3, y3, _ = pm.geodetic2enu(other2.center.lat, other2.center.lon, 0, self.center.lat, self.center.lon, 0)
         r1, r2, r3 = self.radius, other1.radius, other2.radius
 
         A = 2 * (x2 - x1)
@@ -69,9 +280,101 @@ class geoCircle():
         x = (C * E - F * B) / denominator
         y = (A * F - D * C) / denominator
        
-        lat, lon, _ = pm.enu2geodetic(x, y, 0, self.center.lat, self.center.lon, 0)
+        if _flatEarth is not None:
+            lat, lon = _flatEarth.fromENU(x, y)
+        else:
+            lat, lon, _ = pm.enu2geodetic(x, y, 0, self.center.lat, self.center.lon, 0)
         return geoLoc(lat, lon, self.center.alt)
+
+    @staticmethod
+    def multilaterate(circles, guess : geoLoc = None, limits : geoRect = None, exclusions=(), rangeSigma=PARAM.rangeSigma, iterations=20):
+        # Least-squares position estimate from any number of range readings (circles), refined with
+        # Gauss-Newton on the range residuals. Returns the estimate and its 2x2 covariance [m^2] in local
+        # east/north coordinates. With fewer than 3 non-collinear circles the problem is underdetermined,
+        # the estimate is then the solution closest to guess (or to the circle centres) and the covariance
+        # is infinite (every entry is inf).
+        # An estimate is only plausible within max(radii) of every centre, inside limits (if given) and outside
+        # the exclusions (circles known to hold no target, e.g. out of range readings). Collinear centres leave
+        # two mirror solutions, the exclusions usually rule one out. The refinement from guess is used if no
+        # solution is plausible.
+        origin = circles[0].center
+        east, north = GeoArray.from_locs([c.center for c in circles]).toENU(origin)
+        centers = np.column_stack((east, north))
+        radii = np.array([c.radius for c in circles], dtype=float)
+        if exclusions:
+            east, north = GeoArray.from_locs([c.center for c in exclusions]).toENU(origin)
+            excluded = np.column_stack((east, north))
+            excludedRadii = np.array([c.radius for c in exclusions], dtype=float)
+
+        def plausible(p):
+            if np.any(np.linalg.norm(p - centers, axis=1) > radii.max() + 3 * rangeSigma):
+                return False
+            if exclusions and np.any(np.linalg.norm(p - excluded, axis=1) < excludedRadii - 3 * rangeSigma):
+                return False
+            return limits is None or limits.contains(GeoArray.fromENU(p[0], p[1], origin)[0])
+
+        def refine(p):
+            for _ in range(iterations):
+                diff = p - centers
+                dist = np.maximum(np.linalg.norm(diff, axis=1), 1e-6)
+                J = diff / dist[:, None]
+                step, _, _, _ = np.linalg.lstsq(J, radii - dist, rcond=None)
+                stepNorm = np.linalg.norm(step)
+                if stepNorm > radii.max(): # Damping, far steps diverge when the problem is underdetermined
+                    step = step * radii.max() / stepNorm
+                p = p + step
+                if np.linalg.norm(step) < 1e-3:
+                    break
+            return p
+
+        if guess is not None:
+            start = np.array([float(v[0]) for v in GeoArray(guess.lat, guess.lon).toENU(origin)])
+        else:
+            start = centers.mean(axis=0)
+        starts = []
+        A = 2 * (centers[1:] - centers[0])
+        if len(circles) >= 3 and _wellConditioned(A):
+            # Linear initialisation: subtracting the first circle equation from the others. Collinear centres
+            # still give a full rank system through rounding noise, the rank is decided on the singular values.
+            b = radii[0]**2 - radii[1:]**2 + np.sum(centers[1:]**2, axis=1) - np.sum(centers[0]**2)
+            solution, _, _, _ = np.linalg.lstsq(A, b, rcond=None)
+            starts.append(solution)
+        elif len(circles) >= 2 and np.any(A):
+            # Collinear centres: one start on each side of their line, the one closest to start first
+            _, _, axes = np.linalg.svd(centers - centers.mean(axis=0))
+            sides = [centers.mean(axis=0) + sign * radii.mean() * axes[1] for sign in (1, -1)]
+            starts.extend(sorted(sides, key=lambda side: np.linalg.norm(side - start)))
+        p = None
+        for candidate in starts:
+            candidate = refine(candidate)
+            if plausible(candidate):
+                p = candidate
+                break
+        if p is None:
+            p = refine(start)
+
+        diff = p - centers
+        dist = np.maximum(np.linalg.norm(diff, axis=1), 1e-6)
+        residuals = dist - radii
+        J = diff / dist[:, None]
+        variance = max(rangeSigma**2, float(residuals @ residuals) / (len(circles) - 2)) if len(circles) > 2 else rangeSigma**2
+        JtJ = J.T @ J
+        if not _wellConditioned(JtJ):
+            covariance = np.full((2, 2), np.inf)
+        else:
+            covariance = variance * np.linalg.inv(JtJ)
+
+        estimate = GeoArray.fromENU(p[0], p[1], origin)[0]
+        estimate.alt = origin.alt
+        return estimate, covariance
+
+def _wellConditioned(A, tolerance=1e-2):
+    # True if A has rank 2 with its smallest singular value at least tolerance times the largest
+    singular = np.linalg.svd(A, compute_uv=False)
+    return singular.size >= 2 and singular[1] > tolerance * singular[0]
     
+setGeometryMode(PARAM.geometryMode)
+
 if __name__ == "__main__":
     # p1 = geoLoc(0.027467533748910547, 36.90286865957662, 10)
     # p2 = geoLoc(0.028472888028040794, 36.90449713737817, 10)
@@ -0,0 +1,273 @@
+import math
+import time
+import threading
+import functools
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoLoc, GeoArray
+from drones import DroneManager
+from gameServer import GameServer
+from rhinoLoc import RhinoLoc
+
+# Pure Python stand-in for SITL: kinematic drones flying on a simulated clock, and a sense client calling
+# the game server in process. Search strategies run unchanged, a full map search takes seconds and a run
+# is reproducible from its seed, also with a swarm (see SwarmClock).
+
+class SimClock:
+    # Simulated time [s]. Sleeping advances it instantly, unless realTimeFactor is given (e.g. 100 to watch
+    # a search at 100x), in which case it also sleeps duration / realTimeFactor of real time.
+    def __init__(self, start=0.0, realTimeFactor=None):
+        self.now = start
+        self.realTimeFactor = realTimeFactor
+
+    def time(self):
+        return self.now
+
+    def sleep(self, duration, participant=None):
+        if duration <= 0:
+            return
+        if self.realTimeFactor:
+            time.sleep(duration / self.realTimeFactor)
+        self.now += duration
+
+class SwarmClock(SimClock):
+    # Simulated time shared by the drones of a swarm, each one flown by its own thread (discrete-event scheduling).
+    # Only one active drone runs at a time: a drone that sleeps waits until every active drone is asleep (or done),
+    # then the drone waking up first runs (lowest sysID on ties) and the clock jumps to its wake time. Drones thus
+    # act in simulated time order, which drone claims a rhino or a cell first only depends on the seed.
+    # Drones that are not active (e.g. taking off from the main thread) just advance the clock.
+    def __init__(self, start=0.0, realTimeFactor=None):
+        super().__init__(start, realTimeFactor)
+        self.condition = threading.Condition()
+        self.active = set() # Participants (sysIDs) the clock waits for
+        self.wakeTimes = {} # Participant -> wake time, of the active participants that are asleep
+
+    def activate(self, participants):
+        # Must be called before the threads of the participants start
+        with self.condition:
+            self.active.update(participants)
+
+    def deactivate(self, participant):
+        with self.condition:
+            self.active.discard(participant)
+            self.wakeTimes.pop(participant, None)
+            self.condition.notify_all()
+
+    def _next(self):
+        # Participant to run next, None while an active participant is running
+        if len(self.wakeTimes) < len(self.active):
+            return None
+        return min(self.wakeTimes, key=lambda participant: (self.wakeTimes[participant], participant))
+
+    def sleep(self, duration, participant=None):
+        with self.condition:
+            if participant not in self.active:
+                super().sleep(duration)
+                return
+            wakeTime = self.now + max(0.0, duration) # A zero duration still yields to the drones due before
+            self.wakeTimes[participant] = wakeTime
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self._next() == participant)
+            del self.wakeTimes[participant]
+            elapsed = wakeTime - self.now
+            self.now = wakeTime
+        if self.realTimeFactor and elapsed > 0:
+            time.sleep(elapsed / self.realTimeFactor) # Nobody else runs meanwhile, the swarm is slowed down as a whole
+
+class SimDrone:
+    # Same interface as Drone. Each waypoint is flown in a straight line with a trapezoidal speed profile
+    # (accelerate, cruise at speed, decelerate), the position at any time follows from the clock.
+    # Drones of a swarm share one SwarmClock, a drone created alone gets its own clock.
+    def __init__(self, sysID, home : geoLoc = None, clock : SimClock = None, speed=PARAM.simSpeed, acceleration=PARAM.simAcceleration, positionNoise=PARAM.simPositionNoise, seed=None, verbose=False):
+        self.sysID = sysID
+        self.IP = PARAM.IP
+        self.name = f"Drone{sysID}"
+        self.rhinosFound = 0
+        self.clock = clock or SimClock()
+        self.speed = speed
+        self.acceleration = acceleration
+        self.positionNoise = positionNoise
+        self.rng = np.random.default_rng(seed)
+        self.verbose = verbose
+        self.distance = 0.0 # Distance flown [m]
+
+        home = home or geoLoc(*PARAM.simHome)
+        self._startLeg(geoLoc(home.lat, home.lon, home.alt or 0))
+
+    def _startLeg(self, start : geoLoc, target : geoLoc = None):
+        self.legStart = start
+        self.legStartTime = self.clock.time()
+        self.target = target or start
+        east, north = GeoArray(self.target.lat, self.target.lon).toENU(start)
+        self.legVector = np.array([east[0], north[0], self.target.alt - start.alt])
+        self.legLength = float(np.linalg.norm(self.legVector))
+        self.legDuration = self._travelTime(self.legLength)
+
+    def _travelTime(self, distance):
+        # Time to fly distance from hover to hover
+        rampDistance = self.speed**2 / self.acceleration # Accelerating and decelerating
+        if distance >= rampDistance:
+            return distance / self.speed + self.speed / self.acceleration
+        return 2 * math.sqrt(distance / self.acceleration)
+
+    def _travelled(self, elapsed):
+        # Distance flown along the current leg after elapsed seconds
+        if elapsed >= self.legDuration:
+            return self.legLength
+        rampTime = min(self.speed / self.acceleration, self.legDuration / 2)
+        peak = self.acceleration * rampTime
+        if elapsed <= rampTime:
+            return 0.5 * self.acceleration * elapsed**2
+        ramp = 0.5 * self.acceleration * rampTime**2
+        if elapsed <= self.legDuration - rampTime:
+            return ramp + peak * (elapsed - rampTime)
+        remaining = self.legDuration - elapsed
+        return self.legLength - 0.5 * self.acceleration * remaining**2
+
+    def _truePosition(self):
+        travelled = self._travelled(self.clock.time() - self.legStartTime)
+        if self.legLength == 0 or travelled >= self.legLength:
+            return geoLoc(self.target.lat, self.target.lon, self.target.alt), travelled
+        east, north, up = self.legVector * (travelled / self.legLength)
+        pos = GeoArray.fromENU(east, north, self.legStart)[0]
+        return geoLoc(pos.lat, pos.lon, self.legStart.alt + up), travelled
+
+    def printInfo(self, msg, wait=False):
+        if self.verbose:
+            print(f"{self.clock.time():10.1f}s - {self.name}: {msg}")
+
+    def arm(self):
+        self.printInfo("Arming motors")
+
+    def take_off(self, altitude):
+        self.printInfo("Taking off!")
+        pos = self.get_position()
+        self.gotoWP(geoLoc(pos.lat, pos.lon, altitude))
+
+    def get_position(self) -> geoLoc:
+        pos, _ = self._truePosition()
+        if self.positionNoise:
+            east, north = self.rng.normal(0, self.positionNoise, 2)
+            noisy = GeoArray.fromENU(east, north, pos)[0]
+            pos = geoLoc(noisy.lat, noisy.lon, pos.alt)
+        return pos
+
+    def send_to_waypoint(self, waypoint : geoLoc):
+        pos, travelled = self._truePosition()
+        self.distance += travelled
+        if waypoint.alt is None:
+            waypoint.alt = pos.alt
+        self._startLeg(pos, geoLoc(waypoint.lat, waypoint.lon, waypoint.alt))
+
+    def wait_for_waypoint(self, waypoint : geoLoc, timeout=None, threshold=10):
+        # Sleeps on the simulated clock until the end of the current leg (or timeout)
+        remaining = self.legStartTime + self.legDuration - self.clock.time()
+        self.clock.sleep(remaining if timeout is None else min(remaining, timeout), self.sysID)
+        return self.is_waypoint_reached(waypoint, threshold)
+
+    def gotoWP(self, waypoint : geoLoc, timeout=None):
+        self.send_to_waypoint(waypoint)
+        self.printInfo(f"Moving to {waypoint}")
+        if not self.wait_for_waypoint(waypoint, timeout):
+            self.printInfo(f"Waypoint not reached after {timeout}s {waypoint}")
+            return False
+
+        self.printInfo(f"Waypoint reached {waypoint}")
+        return True
+
+    def is_waypoint_reached(self, waypoint : geoLoc, threshold=10):
+        pos = self.get_position()
+        dist = pos.distTo(waypoint)
+        return dist < threshold
+
+    def get_distance_flown(self):
+        _, travelled = self._truePosition()
+        return self.distance + travelled
+
+    def get_rhinos_found(self):
+        return self.rhinosFound
+
+    def reset_rhinos_found(self):
+        self.rhinosFound = 0
+
+class SimDroneManager(DroneManager):
+    # DroneManager whose swarm is made of SimDrones, lined up eastwards from PARAM.simHome like the SITL
+    # swarm. Drone seeds derive from the swarm seed and all drones share one SwarmClock: drones run by
+    # runPerDrone (e.g. SwarmSearch) act in simulated time order, a swarm run is reproducible from its seed.
+    def __init__(self, seed=None, realTimeFactor=None, verbose=False):
+        super().__init__()
+        self.seed = seed
+        self.verbose = verbose
+        self.clock = SwarmClock(realTimeFactor=realTimeFactor)
+
+    def now(self):
+        return self.clock.time()
+
+    def sleep(self, duration, droneID):
+        self.clock.sleep(duration, droneID)
+
+    def runPerDrone(self, tasks):
+        self.clock.activate(tasks.keys())
+
+        def run(droneID, task):
+            try:
+                self.clock.sleep(0, droneID) # Wait for the turn of this drone
+                task()
+            finally:
+                self.clock.deactivate(droneID)
+
+        super().runPerDrone({droneID: functools.partial(run, droneID, task) for droneID, task in tasks.items()})
+
+    def createSwarm(self, n, takeoff=True, listenOnly=False):
+        home = geoLoc(*PARAM.simHome)
+        for droneID in range(1, n + 1):
+            seed = None if self.seed is None else [self.seed, droneID]
+            self.drones[droneID] = SimDrone(droneID, home.offset((droneID - 1) * PARAM.simHomeSpacing, 0), self.clock, seed=seed, verbose=self.verbose)
+        if takeoff:
+            # All drones take off at the same time
+            self.runPerDrone({droneID: functools.partial(self._takeOff, drone) for droneID, drone in self.drones.items()})
+        return {droneID: {"time": self.clock.time(), "error": None} for droneID in self.drones}
+
+    def _takeOff(self, drone):
+        drone.arm()
+        drone.take_off(PARAM.takeOffAltitude)
+
+class SimSenseClient:
+    # Same interface as SenseClient, senses are answered in process by a GameServer (whose HTTP server is
+    # never started), so rhinos are claimed and scores credited exactly as in a real game.
+    def __init__(self, game : GameServer):
+        self.game = game
+
+    def handshake(self):
+        return "Hello from the Rhino Search server!"
+
+    def sense(self, droneID):
+        return self.game.sense(droneID)
+
+    def sense_batch(self, droneIDs):
+        return self.game.sense_batch(list(droneIDs))
+
+    def latency_stats(self):
+        return {"count": 0}
+
+    def close(self):
+        pass
+
+def simulate(droneNbr=1, rhinoNbr=PARAM.rhinoNbr, seed=None, realTimeFactor=None, verbose=False):
+    # Simulated game: (droneManager, senseClient, rhinoLoc), ready for any search strategy
+    droneManager = SimDroneManager(seed, realTimeFactor, verbose)
+    droneManager.createSwarm(droneNbr)
+    rhinoLoc = RhinoLoc(rhinoNbr, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east), seed=seed)
+    return droneManager, SimSenseClient(GameServer(droneManager, rhinoLoc)), rhinoLoc
+
+
+if __name__ == "__main__":
+    from drones import SimpleSearch, LawnmowerSearch, TriangulationSearch, ProbabilisticSearch
+
+    for strategy in (SimpleSearch, LawnmowerSearch, TriangulationSearch, ProbabilisticSearch):
+        start = time.time()
+        droneManager, senseClient, rhinoLoc = simulate(seed=0)
+        drone = droneManager.drones[1]
+        strategy(drone, senseClient=senseClient).search()
+        print(f"{strategy.__name__}: {drone.get_rhinos_found()}/{rhinoLoc.n} rhinos found, {drone.get_distance_flown() / 1000:.1f}km in {drone.clock.time() / 60:.0f}min simulated ({time.time() - start:.1f}s)")
@@ -4,17 +4,25 @@ if sys.version_info.major == 3 and sys.version_info.minor >= 10:
     import collections
     setattr(collections, "MutableMapping", collections.abc.MutableMapping)
 
-from dataTypes import geoLoc, geoCircle
+from dataTypes import geoLoc, geoCircle, geoRect, GeoArray
 import time
 from dronekit import connect, VehicleMode, LocationGlobalRelative
 import itertools
 from pymavlink import mavutil
 import param as PARAM
-import requests
+import metrics
+from senseClient import get_client
+import coveragePlanner
+from coverageCache import CoverageCache
 import numpy as np
 import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 class Drone:
+    printLock = threading.Lock() # Drones may print concurrently (e.g. parallel swarm bring-up)
+    lastWaitDrone = None # Name of the drone whose waiting line was printed last, this line gets overwritten
+
     def __init__(self, sysID, IP, portNumber, takeoff):
         self.sysID = sysID
         self.IP = IP
@@ -24,32 +32,41 @@ class Drone:
         self.name = f"Drone{sysID}"
         self.spinner = itertools.cycle(['-', '/', '|', '\\'])
         self.rhinosFound = 0
-        self.isLastWait = False
+        self.positionUpdate = threading.Condition() # Notified on every new position sample
 
         self.printInfo(f"Connecting to {IP}:{portNumber}")
         self.startConnection()
 
     def startConnection(self):
-        self.vehicle = connect(f"tcp:{self.IP}:{self.portNumber}", wait_ready=True)
+        self.vehicle = connect(f"tcp:{self.IP}:{self.portNumber}", wait_ready=True, timeout=PARAM.connectTimeout, heartbeat_timeout=PARAM.connectTimeout)
+        self.vehicle.add_attribute_listener('location.global_relative_frame', self._on_position)
         
         if self.takeoff:
-            while not self.vehicle.is_armable:
-                self.printInfo(" Waiting for vehicle to initialise...", wait=True)
-                time.sleep(1)
-            
-            self.arm()
-            self.take_off(PARAM.takeOffAltitude)
+            try:
+                deadline = time.time() + PARAM.connectTimeout
+                while not self.vehicle.is_armable:
+                    if time.time() > deadline:
+                        raise TimeoutError(f"Vehicle not armable after {PARAM.connectTimeout}s")
+                    self.printInfo(" Waiting for vehicle to initialise...", wait=True)
+                    time.sleep(1)
+                
+                self.arm()
+                self.take_off(PARAM.takeOffAltitude)
+            except Exception:
+                self.vehicle.close() # The drone is left out of the swarm, do not leak its connection
+                raise
 
     def printInfo(self, msg, wait=False):
-        if wait:
-            if not self.isLastWait:
-                print()
-            sys.stdout.write("\033[F\033[K")
-            sys.stdout.write(f"\r{time.strftime('%Y-%m-%d %H:%M:%S')} - {self.name}: {next(self.spinner)} {msg}\n")
-            self.isLastWait = True
-        else:
-            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {self.name}: {msg}")        
-            self.isLastWait = False
+        with Drone.printLock:
+            if wait:
+                if Drone.lastWaitDrone != self.name:
+                    print()
+                sys.stdout.write("\033[F\033[K")
+                sys.stdout.write(f"\r{time.strftime('%Y-%m-%d %H:%M:%S')} - {self.name}: {next(self.spinner)} {msg}\n")
+                Drone.lastWaitDrone = self.name
+            else:
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {self.name}: {msg}")        
+                Drone.lastWaitDrone = None
 
     def arm(self):
         self.printInfo("Switch to GUIDED and arming motors")
@@ -57,7 +74,10 @@ class Drone:
         self.vehicle.armed = True
     
         # Wait for vehicle to arm
+        deadline = time.time() + PARAM.connectTimeout
         while not self.vehicle.armed:
+            if time.time() > deadline:
+                raise TimeoutError(f"Vehicle not armed after {PARAM.connectTimeout}s")
             self.printInfo(" Waiting for arming...", wait=True)
             time.sleep(1)
 
@@ -66,12 +86,15 @@ class Drone:
         self.printInfo("Taking off!")
         self.vehicle.simple_takeoff(altitude) 
 
+        deadline = time.time() + PARAM.takeOffTimeout
         while True:
             self.printInfo(f" Altitude: {self.vehicle.location.global_relative_frame.alt}", wait=True)
             # Break and return from function just below target altitude.
             if self.vehicle.location.global_relative_frame.alt >= altitude * PARAM.takeOffThreshold:
                 self.printInfo("Reached target altitude")
                 break
+            if time.time() > deadline:
+                raise TimeoutError(f"Target altitude not reached after {PARAM.takeOffTimeout}s")
             time.sleep(1) 
 
     def get_position(self) -> geoLoc:
@@ -84,14 +107,25 @@ class Drone:
         point = LocationGlobalRelative(waypoint.lat, waypoint.lon, waypoint.alt)
         self.vehicle.simple_goto(point)
 
-    def gotoWP(self, waypoint : geoLoc):
+    def _on_position(self, *args):
+        with self.positionUpdate:
+            self.positionUpdate.notify_all()
+
+    def wait_for_waypoint(self, waypoint : geoLoc, timeout=None, threshold=10):
+        # Re-evaluated on every position sample, returns within one telemetry period of the arrival.
+        # Returns False if the waypoint was not reached within timeout seconds.
+        with self.positionUpdate:
+            return self.positionUpdate.wait_for(lambda: self.is_waypoint_reached(waypoint, threshold), timeout)
+
+    def gotoWP(self, waypoint : geoLoc, timeout=None):
         self.send_to_waypoint(waypoint)
-        while not self.is_waypoint_reached(waypoint):
-            self.printInfo(f"Moving to {waypoint}", wait=True)
-            # self.vehicle.home_location = self.vehicle.location.global_frame
-            time.sleep(1)
+        self.printInfo(f"Moving to {waypoint}")
+        if not self.wait_for_waypoint(waypoint, timeout):
+            self.printInfo(f"Waypoint not reached after {timeout}s {waypoint}")
+            return False
 
         self.printInfo(f"Waypoint reached {waypoint}")
+        return True
             
     def is_waypoint_reached(self, waypoint : geoLoc, threshold=10):
         pos = self.get_position()
@@ -104,29 +138,83 @@ class Drone:
     def reset_rhinos_found(self):
         self.rhinosFound = 0
 
-class DroneListener(Drone):
-    def __init__(self, sysID, IP, portNumber, mavlinkHandler):
+class MavlinkDemux:
+    # Single reader thread draining a shared mavlink connection. GLOBAL_POSITION_INT messages are
+    # dispatched by source system into a per-drone latest-position slot so that readers never
+    # block on (or discard) telemetry that belongs to another drone.
+    def __init__(self, mavlinkHandler):
         self.mavlinkHandler = mavlinkHandler
+        self.lock = threading.Lock()
+        self.positions = {} # sysID -> (lat, lon, alt, timestamp)
+        self.firstSample = {} # sysID -> threading.Event set once a sample was received
+        self.callbacks = {} # sysID -> function called after each new sample
+        self.recorder = None # Optional TelemetryRecorder, gets every sample
+        self.running = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def _event(self, sysID):
+        with self.lock:
+            return self.firstSample.setdefault(sysID, threading.Event())
+
+    def _run(self):
+        while self.running:
+            msg = self.mavlinkHandler.recv_match(type='GLOBAL_POSITION_INT', blocking=True, timeout=1)
+            if not msg:
+                continue
+            sysID = msg.get_srcSystem()
+            timestamp = getattr(msg, "_timestamp", time.time())
+            with self.lock:
+                self.positions[sysID] = (msg.lat * 1e-7, msg.lon * 1e-7, msg.alt * 1e-3, timestamp)
+            if self.recorder is not None:
+                self.recorder.record(sysID, msg, timestamp)
+            self._event(sysID).set()
+            if sysID in self.callbacks:
+                self.callbacks[sysID]()
+
+    def latest(self, sysID, timeout=PARAM.telemetryTimeout):
+        # Only waits until the first sample of the drone arrived, afterwards it never blocks.
+        # Returns None if no sample arrived within timeout seconds.
+        self._event(sysID).wait(timeout)
+        with self.lock:
+            return self.positions.get(sysID)
+
+class DroneListener(Drone):
+    def __init__(self, sysID, IP, portNumber, demux):
+        self.demux = demux
         super().__init__(sysID, IP, portNumber, False)
 
     def startConnection(self):
         # self.vehicle = mavutil.mavlink_connection(f'udpin:{self.IP}:{self.portNumber}')
-        self.vehicle = self.mavlinkHandler
-
-    def get_position(self):
-        while True:
-            msg = self.vehicle.recv_match(type='GLOBAL_POSITION_INT', blocking=True)
-            if not msg:
-                continue
-            elif msg.get_srcSystem()==self.sysID:
-                msg = msg.to_dict()
-                return geoLoc(msg["lat"] * 1e-7, msg["lon"] * 1e-7, msg["alt"]  * 1e-3)
-            else:
-                continue
+        self.vehicle = self.demux.mavlinkHandler
+        self.demux.callbacks[self.sysID] = self._on_position
+
+    def get_position(self, withTimestamp=False):
+        # None if the drone never sent telemetry
+        start = metrics.clock()
+        sample = self.demux.latest(self.sysID)
+        if sample is None:
+            return (None, None) if withTimestamp else None
+        lat, lon, alt, timestamp = sample
+        if start:
+            metrics.positionDuration.observeSince(start, str(self.sysID))
+            metrics.positionAge.set(time.time() - timestamp, str(self.sysID))
+        if withTimestamp:
+            return geoLoc(lat, lon, alt), timestamp
+        return geoLoc(lat, lon, alt)
 
 class DroneManager:
     def __init__(self):
         self.drones = {}
+        self.demux = None
+        self.lock = threading.Lock()
 
     def get_drone_position(self, droneID):
         return self.drones[droneID].get_position()
@@ -135,7 +223,8 @@ class DroneManager:
         return self.drones[droneID].get_rhinos_found()
     
     def reset_rhinos_found(self, droneID):
-        self.drones[droneID].reset_rhinos_found()
+        with self.lock:
+            self.drones[droneID].reset_rhinos_found()
 
     def send_drone_to_waypoint(self, droneID, waypoint):
         self.drones[droneID].send_to_waypoint(waypoint)
@@ -147,16 +236,58 @@ class DroneManager:
         return self.drones.keys()
     
     def rhinoFound(self, droneID):
-        self.drones[droneID].rhinosFound += 1
+        with self.lock:
+            self.drones[droneID].rhinosFound += 1
+
+    def now(self):
+        # Time of the swarm [s], simulated swarms have their own clock (see droneSim.py)
+        return time.time()
+
+    def sleep(self, duration, droneID):
+        # Sleep of a drone task run by runPerDrone, simulated swarms sleep on their clock
+        time.sleep(duration)
+
+    def runPerDrone(self, tasks):
+        # Runs tasks {droneID: function} at the same time, one thread per drone, and returns once all are done
+        threads = [threading.Thread(target=task, daemon=True) for task in tasks.values()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
 
     def createSwarm(self, n, takeoff=True, listenOnly=False):
         if listenOnly:
             mavlinkHandler = mavutil.mavlink_connection(f'udpin:{PARAM.IP}:{PARAM.PORT_LISTERNER}')
+            self.demux = MavlinkDemux(mavlinkHandler)
+            self.demux.start()
             for i in range(n):
-                self.drones[i+1] = DroneListener(sysID=i+1, IP=PARAM.IP, portNumber=PARAM.PORT_LISTERNER, mavlinkHandler=mavlinkHandler)
+                self.drones[i+1] = DroneListener(sysID=i+1, IP=PARAM.IP, portNumber=PARAM.PORT_LISTERNER, demux=self.demux)
         else:
-            for i in range(n):
-                self.drones[i+1] = Drone(sysID=i+1, IP=PARAM.IP, portNumber=PARAM.PORT_MASTER + i*10, takeoff=takeoff)
+            return self._createDronesParallel(n, takeoff)
+
+    def _createDronesParallel(self, n, takeoff):
+        # Connect (and take off) all drones concurrently. A drone that fails is reported and left out
+        # of the swarm without blocking the others. Returns {droneID: {"time": s, "error": str or None}}.
+        def bringUp(droneID):
+            start = time.time()
+            try:
+                drone = Drone(sysID=droneID, IP=PARAM.IP, portNumber=PARAM.PORT_MASTER + (droneID-1)*10, takeoff=takeoff)
+                return droneID, drone, time.time() - start, None
+            except Exception as e:
+                return droneID, None, time.time() - start, f"{type(e).__name__}: {e}"
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=min(n, PARAM.swarmWorkers)) as executor:
+            results = list(executor.map(bringUp, range(1, n+1)))
+
+        report = {}
+        for droneID, drone, duration, error in results:
+            if drone is not None:
+                self.drones[droneID] = drone
+            report[droneID] = {"time": duration, "error": error}
+            print(f"Drone{droneID}: {'ready' if error is None else 'FAILED'} after {duration:.1f}s{'' if error is None else ' - ' + error}")
+        print(f"Swarm ready: {len(self.drones)}/{n} drones in {time.time() - start:.1f}s")
+        return report
 
     def getDroneIP(self, droneID, listenOnly=False):
         if PARAM.IP in {"localhost", "0.0.0.0", "127.0.0.1"}:
@@ -184,7 +315,7 @@ class DroneManager:
             elif key == "e":
                 print(f"@@@@ Sensing with drone {droneID}")
                  # Sense
-                response = requests.post(PARAM.URL_SENSE, json={"drone_id": droneID}).json()["sense_status"]
+                response = get_client(PARAM.IP).sense(droneID)
                 print(f"\t\t{response}")
             elif key == "a":
                 print(f"@@@@ Moving drone {droneID} west 100m")
@@ -213,31 +344,36 @@ class DroneManager:
                 continue
 
 class SimpleSearch:
-    def __init__(self, drone : Drone):
+    def __init__(self, drone : Drone, senseClient=None, limits : geoRect = None, stopEvent : threading.Event = None):
         self.drone = drone
+        self.senseClient = senseClient or get_client(PARAM.IP)
+        self.limits = limits or geoRect.fromParam() # Area searched by this drone
+        self.stopEvent = stopEvent or threading.Event() # Set by a swarm orchestrator to end the search early
 
     def search(self):
-        limit_north = PARAM.limit_north
-        limit_south = PARAM.limit_south
-        limit_east = PARAM.limit_east
-        limit_west = PARAM.limit_west
+        limit_north = self.limits.north
+        limit_south = self.limits.south
+        limit_east = self.limits.east
+        limit_west = self.limits.west
 
         pNW = geoLoc(limit_north, limit_west)
         pNE = geoLoc(limit_north, limit_east)
         pSW = geoLoc(limit_south, limit_west)
 
-        latStepNbr = int(pNW.distTo(pNE) // PARAM.sensorRange + 1)
-        lonStepNbr = int(pNW.distTo(pSW) // PARAM.sensorRange + 1)
+        latStepNbr = int(pNW.distTo(pSW) // PARAM.sensorRange + 1) # Rows span the height
+        lonStepNbr = int(pNW.distTo(pNE) // PARAM.sensorRange + 1) # Columns span the width
 
         lat_points = np.linspace(limit_south, limit_north, latStepNbr).tolist()
         lon_points = np.linspace(limit_west, limit_east, lonStepNbr).tolist()
         grid_points = [geoLoc(lat, lon, PARAM.takeOffAltitude) for lat in lat_points for lon in (lon_points if lat_points.index(lat) % 2 == 0 else lon_points[::-1])]
         for point in grid_points:
+            if self.stopEvent.is_set():
+                break
             self.drone.gotoWP(point)
             self.sense()
     
     def sense(self):
-        result =  requests.post(PARAM.URL_SENSE, json={"drone_id": self.drone.sysID}).json()["sense_status"]
+        result = self.senseClient.sense(self.drone.sysID)
         pos = self.drone.get_position()
         if result["state"] == "found":
             self.drone.printInfo(f"Rhino found at {pos}")
@@ -259,7 +395,7 @@ class SimpleSearch:
         circles = []
         for point in p:
             self.drone.gotoWP(point)
-            rep = requests.post(PARAM.URL_SENSE, json={"drone_id": self.drone.sysID}).json()["sense_status"]
+            rep = self.senseClient.sense(self.drone.sysID)
             if rep["state"] == "found":
                 self.drone.printInfo(f"Rhino found at {point}")
                 self.sense()
@@ -277,7 +413,227 @@ class SimpleSearch:
             self.drone.gotoWP(circles[0].center)
             self.proximitySearch(circles[0])
         else:
-            raise ValueError(f"Unexpected number of circles: {len(circles)}")
+            self.drone.printInfo(f"Rhino out of range at {circle.center}, likely found by another drone")
+
+class LawnmowerSearch:
+    def __init__(self, drone : Drone, senseClient=None, limits : geoRect = None, stopEvent : threading.Event = None, cache : CoverageCache = None):
+        self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
+        self.limits = limits or geoRect.fromParam() # Area searched by this drone
+        self.stopEvent = stopEvent or threading.Event() # Set by a swarm orchestrator to end the search early
+        self.cache = cache or CoverageCache() # Where readings already proved there is no unfound rhino, may be shared by a swarm
+
+    def grid(self):
+        # Every point of the area is within foundThreshold of a waypoint, a rhino anywhere is found by one of the senses
+        return coveragePlanner.plan(self.limits, PARAM.foundThreshold, start=self.drone.get_position())
+
+    def search(self):
+        for point in self.grid():
+            if self.stopEvent.is_set():
+                break
+            if self.cache.is_covered(point, PARAM.foundThreshold):
+                continue # Earlier readings already cleared the area this waypoint is meant to cover
+            self.drone.gotoWP(point)
+            self.sense()
+    
+    def sense(self):
+        result = self.senseClient.sense(self.drone.sysID)
+        pos = self.drone.get_position()
+        self.cache.record(pos, result)
+        if result["state"] == "found":
+            self.drone.printInfo(f"Rhino found at {pos}")
+
+
+class TriangulationSearch:
+    def __init__(self, drone : Drone, senseClient=None, limits : geoRect = None, stopEvent : threading.Event = None, cache : CoverageCache = None):
+        self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
+        self.limits = limits or geoRect.fromParam() # Area searched by this drone
+        self.stopEvent = stopEvent or threading.Event() # Set by a swarm orchestrator to end the search early
+        self.cache = cache or CoverageCache() # Where readings already proved there is no unfound rhino, may be shared by a swarm
+        self.found = 0 # Rhinos found by this search
+
+    def search(self):
+        grid_points = coveragePlanner.plan(self.limits, PARAM.sensorRange, start=self.drone.get_position())
+        # A reading only reports the closest rhino, which may hide others further away: after a find the waypoint
+        # is sensed again, until it reads out_of_range. A waypoint whose proximity search failed (e.g. its readings
+        # came from different rhinos) is retried in a later pass, once other rhinos were found.
+        pending = list(grid_points)
+        while pending and not self.stopEvent.is_set():
+            found = self.found
+            retry = []
+            for point in pending:
+                while not self.stopEvent.is_set() and not self.cache.is_covered(point, PARAM.sensorRange):
+                    before = self.found
+                    self.drone.gotoWP(point)
+                    if self.sense() == "out_of_range":
+                        break
+                    if self.found == before:
+                        retry.append(point)
+                        break
+            if self.found == found:
+                break # Nothing found in this pass, the retries would fail the same way
+            pending = retry
+    
+    def sense(self):
+        result = self.senseClient.sense(self.drone.sysID)
+        pos = self.drone.get_position()
+        self.cache.record(pos, result)
+        if result["state"] == "found":
+            self.found += 1
+            self.drone.printInfo(f"Rhino found at {pos}")
+            self.sense() # Sense again to check if multiple rhinos are in range 
+        elif result["state"] == "out_of_range":
+            pass
+        else:
+            self.drone.printInfo(f"Rhino in range at {pos}")
+            self.proximitySearch(geoCircle(pos, result["distance"]))
+        return result["state"]
+
+    def proximitySearch(self, circle : geoCircle):
+        offset = PARAM.foundThreshold
+        p = []
+        p.append(circle.center.offset(-offset, offset))
+        p.append(circle.center.offset(offset, offset))
+        p.append(circle.center.offset(offset, -offset))
+        p.append(circle.center.offset(-offset, -offset))
+
+        # Every in range reading constrains the position of the rhino, all of them are used for the estimate.
+        # Three non-collinear readings are enough for a first estimate, the remaining probes are skipped.
+        circles = [circle]
+        exclusions = [] # Out of range readings, the rhino is not within sensor range of them
+        while p and len(circles) < 3:
+            if self.probe(p.pop(0), circles, exclusions) == "found":
+                return
+
+        for _ in range(PARAM.proximityMaxIterations):
+            if self.stopEvent.is_set():
+                return
+            estimate, covariance = geoCircle.multilaterate(circles, guess=circles[-1].center, limits=self.limits, exclusions=exclusions)
+            estimate = self.limits.clamp(estimate) # Never fly out of the search area, even on a poor estimate
+            closest = min(c.radius for c in circles)
+            state = self.probe(estimate, circles, exclusions)
+            if state == "found":
+                return
+            elif state == "out_of_range" or circles[-1].radius >= closest:
+                break # The estimate did not get closer to a rhino
+        else:
+            self.drone.printInfo(f"Rhino not found after {PARAM.proximityMaxIterations} estimates")
+            return
+
+        # The readings came from different rhinos (a reading gives the closest one), or the rhino was found by
+        # another drone. Start over from the closest reading, the closer to a rhino the more likely all readings
+        # come from it.
+        for point in p:
+            if self.probe(point, circles, exclusions) == "found":
+                return
+        closest = min(circles, key=lambda c: c.radius)
+        if closest.radius < circle.radius:
+            self.proximitySearch(closest)
+
+    def probe(self, point : geoLoc, circles, exclusions):
+        # Senses at point and adds the reading to circles or exclusions, returns its state
+        self.drone.gotoWP(point)
+        rep = self.senseClient.sense(self.drone.sysID)
+        pos = self.drone.get_position()
+        self.cache.record(pos, rep)
+        if rep["state"] == "found":
+            self.found += 1
+            self.drone.printInfo(f"Rhino found at {pos}")
+            self.sense()
+        elif rep["state"] == "in_range":
+            circles.append(geoCircle(pos, rep["distance"]))
+        else:
+            exclusions.append(geoCircle(pos, PARAM.sensorRange))
+        return rep["state"]
+
+
+class ProbabilisticSearch:
+    # Keeps a grid of the probability that each cell of the map holds an unfound rhino and updates it after
+    # every sense: out_of_range clears the sensor disk, in_range clears the disk inside the reading and puts
+    # a rhino on its ring, found clears the disk inside the found distance. The next waypoint maximises the
+    # expected information (entropy within sensor range) plus the chance of finding a rhino, per metre flown.
+    def __init__(self, drone : Drone, senseClient=None, limits : geoRect = None, stopEvent : threading.Event = None):
+        self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
+        self.limits = limits or geoRect.fromParam() # Area searched by this drone
+        self.stopEvent = stopEvent or threading.Event() # Set by a swarm orchestrator to end the search early
+        self.found = 0 # Rhinos found by this search
+
+        self.cellSize = PARAM.occupancyCellSize
+        self.origin = geoLoc(self.limits.south, self.limits.west)
+        nx = max(1, int(np.ceil(self.limits.width() / self.cellSize)))
+        ny = max(1, int(np.ceil(self.limits.height() / self.cellSize)))
+        self.east, self.north = np.meshgrid((np.arange(nx) + 0.5) * self.cellSize, (np.arange(ny) + 0.5) * self.cellSize)
+        self.prob = np.full((ny, nx), min(0.5, PARAM.rhinoNbr / (nx * ny)))
+        self.halfDiag = self.cellSize / 2**0.5 # A cell is entirely inside a disk if its centre is this much inside
+
+        self.sensed = np.zeros((ny, nx), dtype=bool) # Cells within foundThreshold of a past sensing position
+        # Disk kernels (in cells) used to sum entropy / probability around candidate waypoints
+        self.senseKernel = self._disk(PARAM.sensorRange)
+        self.foundKernel = self._disk(PARAM.foundThreshold)
+
+    def _disk(self, radius):
+        k = int(radius // self.cellSize)
+        x, y = np.meshgrid(np.arange(-k, k + 1), np.arange(-k, k + 1))
+        return (np.hypot(x, y) * self.cellSize <= radius).astype(float)
+
+    def _windowSum(self, grid, kernel):
+        # Sum of grid under kernel centred on every cell (2D convolution with zero padding, using FFTs)
+        k = kernel.shape[0] // 2
+        shape = (grid.shape[0] + 2 * k, grid.shape[1] + 2 * k)
+        full = np.fft.irfft2(np.fft.rfft2(grid, shape) * np.fft.rfft2(kernel, shape), shape)
+        return full[k:k + grid.shape[0], k:k + grid.shape[1]]
+
+    def update(self, position : geoLoc, result):
+        east, north = GeoArray(position.lat, position.lon).toENU(self.origin)
+        dist = np.hypot(self.east - east[0], self.north - north[0])
+        self.sensed |= dist <= PARAM.foundThreshold
+        if result["state"] == "out_of_range":
+            self.prob[dist + self.halfDiag <= PARAM.sensorRange] = 0
+        else:
+            # No unfound rhino is closer than the reading
+            self.prob[dist + self.halfDiag < result["distance"]] = 0
+            if result["state"] == "in_range":
+                # At least one rhino lies on the ring: P(cell | ring occupied) = p / (1 - prod(1 - p))
+                ring = np.abs(dist - result["distance"]) <= self.halfDiag
+                occupied = 1 - np.prod(1 - self.prob[ring])
+                if occupied > 0:
+                    self.prob[ring] = np.minimum(1, self.prob[ring] / occupied)
+
+    def nextWaypoint(self, position : geoLoc):
+        p = np.clip(self.prob, 1e-12, 1 - 1e-12)
+        entropy = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+        # Expected information: the entropy in sensor range is cleared if the reading is out_of_range,
+        # which happens with probability prod(1 - p) ~ exp(-sum(p)) over the sensor disk
+        clearing = self._windowSum(entropy, self.senseKernel) * np.exp(-self._windowSum(self.prob, self.senseKernel))
+        finding = 1 - np.exp(-self._windowSum(self.prob, self.foundKernel))
+        gain = clearing + PARAM.occupancyFindWeight * finding
+        gain[self.sensed] = 0 # Sensing again close to a past position brings (almost) no information
+        east, north = GeoArray(position.lat, position.lon).toENU(self.origin)
+        score = gain / (np.hypot(self.east - east[0], self.north - north[0]) + PARAM.sensorRange / 2)
+        best = np.unravel_index(np.argmax(score), score.shape)
+        waypoint = GeoArray.fromENU(self.east[best], self.north[best], self.origin)[0]
+        waypoint.alt = PARAM.takeOffAltitude
+        return waypoint
+
+    def search(self):
+        self.sense()
+        for _ in range(PARAM.occupancyMaxSteps):
+            # The grid knows nothing of the number of rhinos left, only finding them all or clearing the map ends the search
+            if self.stopEvent.is_set() or self.found >= PARAM.rhinoNbr or not np.any(self.prob[~self.sensed]):
+                break
+            self.drone.gotoWP(self.nextWaypoint(self.drone.get_position()))
+            self.sense()
+
+    def sense(self):
+        result = self.senseClient.sense(self.drone.sysID)
+        pos = self.drone.get_position()
+        self.update(pos, result)
+        if result["state"] == "found":
+            self.found += 1
+            self.drone.printInfo(f"Rhino found at {pos}")
+            self.sense() # Sense again to check if multiple rhinos are in range
 
 if __name__ == "__main__":
     dm = DroneManager()
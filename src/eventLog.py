@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import struct
+import threading
+import collections
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoLoc, GeoArray
+
+# Append-only binary log of a game: a 16 bytes header followed by fixed-size 40 bytes records.
+#   SENSE     a sense request of drone (position) and its result (state, distance, rhino index if found)
+#   FOUND     rhino found by drone (rhino position, distance)
+#   POSITION  periodic drone position
+#   RESET     new game, followed by one RHINO record per rhino of the new herd
+#   RHINO     rhino of the current herd (index, position)
+# Writers only append a tuple to a deque, a background thread packs and writes the records, so logging
+# costs the sense path no I/O. The file can be read (e.g. with readLog) while it is being written.
+#   python eventLog.py logs/game_20250101_120000.rlog      summary of a log
+# See replay.py to replay a log in the game GUI or into /metrics.
+
+MAGIC = b"RHINOLOG"
+VERSION = 2 # Version 1 had a one byte drone id
+HEADER = struct.Struct("<8sII") # Magic, version, record size
+RECORD = struct.Struct("<dBHBiddff") # time, type, drone, state, rhino, lat, lon, alt, distance
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("type", "u1"), ("drone", "<u2"), ("state", "u1"), ("rhino", "<i4"), ("lat", "<f8"), ("lon", "<f8"), ("alt", "<f4"), ("distance", "<f4")])
+assert RECORD.size == RECORD_DTYPE.itemsize
+MAX_DRONE = 0xFFFF # Largest drone id a record can hold
+
+SENSE, FOUND, POSITION, RESET, RHINO = 1, 2, 3, 4, 5
+TYPES = {SENSE: "sense", FOUND: "found", POSITION: "position", RESET: "reset", RHINO: "rhino"}
+STATES = {"out_of_range": 1, "in_range": 2, "found": 3}
+STATE_NAMES = {code: state for state, code in STATES.items()}
+
+class EventLog:
+    def __init__(self, path, flushPeriod=PARAM.eventLogFlushPeriod):
+        self.path = path
+        self.flushPeriod = flushPeriod
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        append = os.path.exists(path) and os.path.getsize(path) > 0
+        if append:
+            readHeader(path) # Appending to an existing log, its records must have the same layout
+        self.file = open(path, "ab")
+        if not append:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.queue = collections.deque() # Records not written yet, deque.append is thread safe
+        self.records = 0
+        self.dropped = 0 # Records that could not be written
+        self.running = True
+        self.thread = threading.Thread(target=self._writeLoop, daemon=True)
+        self.thread.start()
+
+    def _put(self, kind, drone=0, state=0, rhino=-1, lat=0.0, lon=0.0, alt=None, distance=-1.0):
+        if not 0 <= drone <= MAX_DRONE:
+            self._drop(f"{TYPES[kind]} record of drone {drone!r}", "drone id does not fit in a record")
+            return
+        self.queue.append((time.time(), kind, drone, state, rhino, lat, lon, np.nan if alt is None else alt, distance))
+
+    def sense(self, droneID, position : geoLoc, status, index=None):
+        self._put(SENSE, droneID, STATES[status["state"]], -1 if index is None else index, position.lat, position.lon, position.alt, status["distance"])
+
+    def found(self, droneID, index, rhino : geoLoc, distance):
+        self._put(FOUND, droneID, STATES["found"], index, rhino.lat, rhino.lon, None, distance)
+
+    def positions(self, dronePositions):
+        for droneID, position in dronePositions.items():
+            self._put(POSITION, droneID, lat=position.lat, lon=position.lon, alt=position.alt)
+
+    def reset(self, rhinos : GeoArray):
+        self._put(RESET)
+        for index in range(len(rhinos)):
+            self._put(RHINO, rhino=index, lat=float(rhinos.lat[index]), lon=float(rhinos.lon[index]))
+
+    def _drop(self, what, reason):
+        self.dropped += 1
+        print(f"Event log: {what} dropped, {reason}", file=sys.stderr)
+
+    def flush(self):
+        batch = []
+        while self.queue:
+            record = self.queue.popleft()
+            try:
+                batch.append(RECORD.pack(*record))
+            except struct.error as e: # A bad record is left out, the others are still written
+                self._drop(f"{TYPES.get(record[1], record[1])} record {record}", e)
+        if batch:
+            self.file.write(b"".join(batch))
+            self.file.flush()
+            self.records += len(batch)
+
+    def _writeLoop(self):
+        # Never dies on an error, otherwise the queue would grow for the rest of the game
+        while self.running:
+            time.sleep(self.flushPeriod)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Event log: writing {self.path} failed - {type(e).__name__}: {e}", file=sys.stderr)
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.flush()
+        self.file.close()
+
+def readHeader(path):
+    with open(path, "rb") as f:
+        magic, version, recordSize = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or recordSize != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} rhino event log")
+    return version
+
+def readLog(path):
+    # Zero-copy view of all complete records (a record being written by the game server is left out)
+    readHeader(path)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+
+def printInfo(path):
+    log = readLog(path)
+    print(f"{path}: {len(log)} records of {RECORD.size} bytes")
+    if len(log) == 0:
+        return
+    print(f"    from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log['time'][0]))}, {log['time'][-1] - log['time'][0]:.0f}s")
+    for kind, name in TYPES.items():
+        print(f"    {name:10s} {int(np.sum(log['type'] == kind))}")
+    senses = log[log["type"] == SENSE]
+    for droneID in np.unique(senses["drone"]):
+        states = senses["state"][senses["drone"] == droneID]
+        print(f"    Drone{droneID}: " + ", ".join(f"{name} {int(np.sum(states == code))}" for code, name in STATE_NAMES.items()))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        printInfo(path)
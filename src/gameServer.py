@@ -0,0 +1,252 @@
+from rhinoLoc import RhinoLoc
+from drones import DroneManager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import time
+import threading
+import param as PARAM
+import metrics
+from eventLog import EventLog
+from telemetryRecorder import TelemetryRecorder
+
+NO_TELEMETRY = {"state": "out_of_range", "distance": -1} # Sense status of a drone whose position is unknown
+
+class GameServer:
+    # Game state (rhinos, swarm, scores) and the sense server, independent of any GUI.
+    # A telemetry refresh loop keeps a snapshot of all drone positions that a GUI can attach to.
+    def __init__(self, droneManager=None, rhinoLoc=None, port=PARAM.PORT_SERVER, logRequests=True, eventLogPath=PARAM.eventLogPath, telemetryRecordPath=PARAM.telemetryRecordPath):
+        if droneManager is None:
+            droneManager = DroneManager()
+            droneManager.createSwarm(PARAM.droneNbr, takeoff=False, listenOnly=True)
+        if rhinoLoc is None:
+            rhinoLoc = RhinoLoc(PARAM.rhinoNbr, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east))
+        self.droneManager = droneManager
+        self.rhinoLoc = rhinoLoc
+        self.port = port
+        self.logRequests = logRequests # One access log line per request on stderr
+        self.eventLogPath = eventLogPath
+        self.eventLog = None # Opened by start()
+        self.telemetryRecordPath = telemetryRecordPath
+        self.telemetryRecorder = None # Started by start() if the drones are listened to through a MavlinkDemux
+
+        self.lock = threading.Lock()
+        self.dronePositions = {}
+        self.running = False
+        self.httpd = None
+        self.threads = []
+
+    def sense(self, droneID):
+        position = self.droneManager.get_drone_position(droneID)
+        if position is None:
+            return dict(NO_TELEMETRY)
+        sense_status, index = self.rhinoLoc.senseRhino(position, withIndex=True)
+        self._record(droneID, position, sense_status, index)
+        return sense_status
+
+    def sense_batch(self, droneIDs):
+        positions = [self.droneManager.get_drone_position(droneID) for droneID in droneIDs]
+        located = [i for i, position in enumerate(positions) if position is not None]
+        results = self.rhinoLoc.senseRhinoBatch([positions[i] for i in located], withIndex=True)
+        statuses = [dict(NO_TELEMETRY) for _ in droneIDs]
+        for i, (status, index) in zip(located, results):
+            self._record(droneIDs[i], positions[i], status, index)
+            statuses[i] = status
+        return statuses
+
+    def _record(self, droneID, position, sense_status, index):
+        # Score, metrics and event log of a sense
+        if sense_status["state"] == "found":
+            self.droneManager.rhinoFound(droneID)
+        if metrics.enabled:
+            metrics.senses.inc(str(droneID), sense_status["state"])
+        if self.eventLog is not None:
+            self.eventLog.sense(droneID, position, sense_status, index)
+            if index is not None:
+                self.eventLog.found(droneID, index, self.rhinoLoc.get_rhino_positions()[index], sense_status["distance"])
+
+    def reset_game(self):
+        for drone in self.droneManager.getDroneIDs():
+            self.droneManager.reset_rhinos_found(drone)
+        self.rhinoLoc.regenerate_rhino_positions()
+        if self.eventLog is not None:
+            self.eventLog.reset(self.rhinoLoc.get_rhino_positions())
+
+    def get_drone_positions(self):
+        with self.lock:
+            return dict(self.dronePositions)
+
+    def get_scores(self):
+        return {name: self.droneManager.get_rhinos_found(drone) for drone, name in zip(self.droneManager.getDroneIDs(), self.droneManager.getDroneNames())}
+
+    def refresh(self):
+        positions = {drone: self.droneManager.get_drone_position(drone) for drone in self.droneManager.getDroneIDs()}
+        positions = {drone: position for drone, position in positions.items() if position is not None} # No telemetry yet, not drawn
+        with self.lock:
+            self.dronePositions = positions
+
+    def _refresh_loop(self):
+        lastLogged = 0
+        while self.running:
+            self.refresh()
+            if self.eventLog is not None and time.time() - lastLogged >= PARAM.eventLogPositionPeriod:
+                self.eventLog.positions(self.get_drone_positions())
+                lastLogged = time.time()
+            time.sleep(PARAM.telemetryRefreshPeriod)
+
+    def run_server(self):
+        server_address = ('', self.port)
+        # One thread per connection, connections are kept alive (HTTP/1.1) so that a team sensing in a
+        # loop does not pay a TCP handshake per request and a slow request does not block other teams.
+        self.httpd = ThreadingHTTPServer(server_address, RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.game = self
+        print(f"HTTP server running on port {self.port}")
+        server_thread = threading.Thread(target=self.httpd.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        self.threads.append(server_thread)
+
+    def start(self):
+        if self.eventLogPath is not None:
+            self.eventLog = EventLog(self.eventLogPath.format(time=time.strftime('%Y%m%d_%H%M%S')))
+            self.eventLog.reset(self.rhinoLoc.get_rhino_positions())
+            print(f"Event log: {self.eventLog.path}")
+        demux = getattr(self.droneManager, "demux", None)
+        if self.telemetryRecordPath is not None and demux is not None:
+            self.telemetryRecorder = TelemetryRecorder(self.telemetryRecordPath.format(time=time.strftime('%Y%m%d_%H%M%S')))
+            demux.recorder = self.telemetryRecorder
+            print(f"Telemetry tracks: {self.telemetryRecorder.directory}")
+        self.running = True
+        refresh_thread = threading.Thread(target=self._refresh_loop)
+        refresh_thread.daemon = True
+        refresh_thread.start()
+        self.threads.append(refresh_thread)
+        self.run_server()
+
+    def stop(self):
+        self.running = False
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.eventLog is not None:
+            self.eventLog.close()
+            self.eventLog = None
+        if self.telemetryRecorder is not None:
+            self.droneManager.demux.recorder = None
+            self.telemetryRecorder.close()
+            self.telemetryRecorder = None
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Enables keep-alive, every response must carry a Content-Length
+    disable_nagle_algorithm = True # Headers and body are written separately, avoid the delayed ACK stall on kept-alive connections
+    ENDPOINTS = {f"/{PARAM.END_POINT_HANDSHAKE}", f"/{PARAM.END_POINT_SENSE}", f"/{PARAM.END_POINT_SENSE_BATCH}"}
+
+    def log_request(self, code='-', size='-'):
+        if self.server.game.logRequests:
+            super().log_request(code, size)
+
+    def send_json(self, code, payload):
+        self.send_body(code, json.dumps(payload).encode(), "application/json")
+
+    def send_body(self, code, body, contentType):
+        self.status = code
+        self.send_response(code)
+        self.send_header("Content-type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close") # The client asked for it, tell it the connection is not reused
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(content_length)
+        self.bodyRead = True
+        return json.loads(post_data) if post_data else {}
+
+    @staticmethod
+    def is_known(game, drone_id):
+        # JSON ids are ints, also rejects true, strings and nested lists
+        return type(drone_id) is int and drone_id in game.droneManager.getDroneIDs()
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.send_body(200, metrics.render().encode(), "text/plain; version=0.0.4")
+        else:
+            self.send_json(404, {"error": f"Unknown end point {self.path}"})
+
+    def do_POST(self):
+        start = metrics.clock()
+        self.status = None
+        self.bodyRead = False
+        try:
+            self.handle_post(self.server.game)
+        except Exception as e:
+            self.log_error("%s failed - %s: %s", self.path, type(e).__name__, e)
+            if not self.bodyRead:
+                self.close_connection = True # The rest of the body would be read as the next request
+            if self.status is None:
+                self.send_json(500, {"error": f"Internal server error: {type(e).__name__}"})
+            else:
+                self.close_connection = True # The response was already (partly) sent
+                self.status = 500
+        finally:
+            if start:
+                endpoint = self.path if self.path in RequestHandler.ENDPOINTS else "other" # Unknown paths share a label
+                metrics.httpRequests.inc(endpoint, str(self.status))
+                metrics.httpDuration.observeSince(start, endpoint)
+
+    def handle_post(self, game):
+        if self.path == "/handshake":
+            self.read_json()
+            response = {"message": "Hello from the Rhino Search server!"}
+            self.send_json(200, response)
+        elif self.path == "/sense":
+            data = self.read_json()
+            drone_id = data.get("drone_id")
+            if not drone_id:
+                response = {"error": "Missing drone_id parameter"}
+                self.send_json(400, response)
+            elif not self.is_known(game, drone_id):
+                response = {"error": f"Unknown drone_id {drone_id!r}"}
+                self.send_json(400, response)
+            else:
+                response = {"sense_status": game.sense(drone_id)}
+                self.send_json(200, response)
+        elif self.path == "/sense_batch":
+            # One request for a whole sweep over the swarm, results are returned in the order of drone_ids
+            data = self.read_json()
+            drone_ids = data.get("drone_ids")
+            if not drone_ids:
+                response = {"error": "Missing drone_ids parameter"}
+                self.send_json(400, response)
+                return
+            if not isinstance(drone_ids, list):
+                response = {"error": "drone_ids must be a list"}
+                self.send_json(400, response)
+                return
+            unknown = [drone_id for drone_id in drone_ids if not self.is_known(game, drone_id)]
+            if unknown:
+                response = {"error": f"Unknown drone_ids {unknown}"}
+                self.send_json(400, response)
+                return
+            response = {"drone_ids": drone_ids, "sense_status": game.sense_batch(drone_ids)}
+            self.send_json(200, response)
+        else:
+            self.rfile.read(int(self.headers.get('Content-Length', 0))) # Consume the body, the connection is kept alive
+            self.bodyRead = True
+            self.send_json(404, {"error": f"Unknown end point {self.path}"})
+
+
+if __name__ == "__main__":
+    # Headless game server, e.g. for CI or load tests. Run mainGame.py for the game with its GUI.
+    game = GameServer()
+    game.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        game.stop()
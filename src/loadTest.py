@@ -0,0 +1,156 @@
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+import numpy as np
+
+import param as PARAM
+from gameServer import GameServer
+from rhinoLoc import RhinoLoc
+from droneSim import SimDroneManager
+
+# Load generator for the game server: every simulated team is a thread doing a handshake, then sensing in a loop.
+#   python loadTest.py --local --teams 20 --duration 10               headless server with simulated drones, no SITL
+#   python loadTest.py --host 192.168.1.10 --teams 5 --rate 10        real server, 5 teams sensing 10 times/s each
+#   python loadTest.py --local --connection close                     new TCP connection for every request
+# With --rate, latencies are measured from the time a request was scheduled, so a server that falls behind
+# shows up in the percentiles instead of silently lowering the request rate.
+
+ENDPOINTS = {"handshake": f"/{PARAM.END_POINT_HANDSHAKE}", "sense": f"/{PARAM.END_POINT_SENSE}"}
+
+def startLocalServer(port, droneNbr, rhinoNbr=PARAM.rhinoNbr, seed=0, logRequests=False, eventLogPath=PARAM.eventLogPath):
+    # Headless game server whose drones are hovering SimDrones
+    droneManager = SimDroneManager(seed)
+    droneManager.createSwarm(droneNbr, takeoff=False)
+    rhinoLoc = RhinoLoc(rhinoNbr, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east), seed=seed)
+    game = GameServer(droneManager, rhinoLoc, port=port, logRequests=logRequests, eventLogPath=eventLogPath)
+    game.start()
+    return game
+
+class Team(threading.Thread):
+    def __init__(self, teamID, droneID, args, deadline):
+        super().__init__(daemon=True)
+        self.teamID = teamID
+        self.droneID = droneID
+        self.args = args
+        self.deadline = deadline
+        self.rng = random.Random(teamID)
+        self.connection = None
+        self.records = [] # (endpoint, latency [s], ok)
+        self.errors = {} # Error message -> count
+
+    def request(self, endpoint, payload, scheduled):
+        headers = {"Content-Type": "application/json"}
+        if self.args.connection == "close":
+            headers["Connection"] = "close"
+        body = json.dumps(payload).encode()
+        ok = False
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.args.host, self.args.port, timeout=self.args.timeout)
+            self.connection.request("POST", ENDPOINTS[endpoint], body, headers)
+            response = self.connection.getresponse()
+            response.read()
+            ok = response.status == 200
+            if not ok:
+                self.errors[f"HTTP {response.status}"] = self.errors.get(f"HTTP {response.status}", 0) + 1
+            if response.will_close or self.args.connection == "close":
+                self.close()
+        except Exception as e:
+            self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+            self.close()
+        self.records.append((endpoint, time.perf_counter() - scheduled, ok))
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def run(self):
+        self.request("handshake", {}, time.perf_counter())
+        scheduled = time.perf_counter()
+        while scheduled < self.deadline:
+            if self.args.rate:
+                time.sleep(max(0, scheduled - time.perf_counter()))
+            else:
+                scheduled = time.perf_counter()
+            if self.rng.random() < self.args.handshake_ratio:
+                self.request("handshake", {}, scheduled)
+            else:
+                self.request("sense", {"drone_id": self.droneID}, scheduled)
+            if self.args.rate:
+                scheduled += 1 / self.args.rate
+        self.close()
+
+def histogram(latencies, width=40):
+    # Log scale buckets, from 0.1ms doubling up to the slowest request
+    edges = [1e-4]
+    while edges[-1] < latencies.max():
+        edges.append(edges[-1] * 2)
+    counts, _ = np.histogram(latencies, bins=[0] + edges)
+    lines = []
+    for edge, count in zip(edges, counts):
+        if count:
+            lines.append(f"    <{edge * 1000:8.1f}ms {count:8d} {'#' * max(1, round(width * count / counts.max()))}")
+    return lines
+
+def report(teams, duration):
+    records = [record for team in teams for record in team.records]
+    summary = {"duration": duration, "teams": len(teams), "endpoints": {}}
+    for endpoint in ENDPOINTS:
+        latencies = np.array([latency for e, latency, _ in records if e == endpoint])
+        if latencies.size == 0:
+            continue
+        errors = sum(1 for e, _, ok in records if e == endpoint and not ok)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary["endpoints"][endpoint] = {"requests": int(latencies.size), "throughput": latencies.size / duration, "errorRate": errors / latencies.size,
+                                          "mean": float(latencies.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(latencies.max())}
+        s = summary["endpoints"][endpoint]
+        print(f"/{endpoint}: {s['requests']} requests, {s['throughput']:.0f} req/s, {s['errorRate']:.2%} errors")
+        print(f"    latency p50 {s['p50'] * 1000:.2f}ms  p95 {s['p95'] * 1000:.2f}ms  p99 {s['p99'] * 1000:.2f}ms  max {s['max'] * 1000:.2f}ms")
+        print("\n".join(histogram(latencies)))
+    errors = {}
+    for team in teams:
+        for error, count in team.errors.items():
+            errors[error] = errors.get(error, 0) + count
+    if errors:
+        print("Errors: " + ", ".join(f"{error} x{count}" for error, count in errors.items()))
+    summary["errors"] = errors
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the /handshake and /sense end points of the game server")
+    parser.add_argument("--host", default=PARAM.IP)
+    parser.add_argument("--port", type=int, default=PARAM.PORT_SERVER)
+    parser.add_argument("--local", action="store_true", help="start a headless game server with simulated drones (no SITL) on --port")
+    parser.add_argument("--access-log", action="store_true", help="keep the access log of the --local server (one line per request on stderr)")
+    parser.add_argument("--no-event-log", action="store_true", help="do not write the event log of the --local server")
+    parser.add_argument("--teams", type=int, default=PARAM.droneNbr, help="concurrent teams (threads)")
+    parser.add_argument("--drones", type=int, default=PARAM.droneNbr, help="drones of the server, teams are spread over drone IDs 1..drones")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second of each team, 0 for as fast as possible")
+    parser.add_argument("--duration", type=float, default=10, help="test duration [s]")
+    parser.add_argument("--connection", choices=["keep-alive", "close"], default="keep-alive", help="reuse connections or open one per request")
+    parser.add_argument("--handshake-ratio", type=float, default=0, help="fraction of the requests sent to /handshake instead of /sense")
+    parser.add_argument("--timeout", type=float, default=5, help="request timeout [s]")
+    parser.add_argument("--out", metavar="FILE", help="save the summary as JSON")
+    args = parser.parse_args()
+
+    game = startLocalServer(args.port, args.drones, logRequests=args.access_log, eventLogPath=None if args.no_event_log else PARAM.eventLogPath) if args.local else None
+    try:
+        start = time.perf_counter()
+        teams = [Team(teamID, teamID % args.drones + 1, args, start + args.duration) for teamID in range(args.teams)]
+        for team in teams:
+            team.start()
+        for team in teams:
+            team.join()
+        summary = report(teams, time.perf_counter() - start)
+    finally:
+        if game is not None:
+            game.stop()
+    if args.out:
+        summary["args"] = vars(args)
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
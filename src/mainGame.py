@@ -1,18 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
-from rhinoLoc import RhinoLoc
-from drones import DroneManager
-from http.server import BaseHTTPRequestHandler, HTTPServer
-import json
-import threading
+import time
+import collections
+import numpy as np
+from gameServer import GameServer
 import param as PARAM
-
-rhinoLoc = None 
-droneManager = None
+import metrics
 
 class DroneGUI:
-    def __init__(self, root):
+    # Attaches to a (running) GameServer and displays its state
+    def __init__(self, root, game : GameServer):
         self.root = root
+        self.game = game
         self.root.title("Drone Rhino Search")
         
         self.map_image = tk.PhotoImage(file="ressources/mapOlPejeta.png")
@@ -58,9 +57,18 @@ class DroneGUI:
         self.sense_button = tk.Button(self.control_frame, text="Sense Rhinos", command=self.print_sense_status)
         self.sense_button.grid(row=0, column=2, padx=5)
 
-        global droneManager
-        droneManager = DroneManager()
-        droneManager.createSwarm(PARAM.droneNbr, takeoff=False, listenOnly=True)
+        self.frame_time_label = tk.Label(self.control_frame, text="Frame time: - ms")
+        self.frame_time_label.grid(row=0, column=3, padx=5)
+        self.frame_times = collections.deque(maxlen=50)
+
+        # Persistent canvas items, moved/retinted in update() instead of being recreated every frame
+        self.drone_items = {} # droneID -> (icon item, label item, (x, y))
+        self.rhino_items = [] # one icon item per rhino
+        self.rhino_drawn = None # (rhino positions, canvas size) the rhino items were placed for
+        self.rhino_state = None # Image shown per rhino (0 hidden, 1 red, 2 green)
+        self.leaderboard_values = {}
+
+        droneManager = self.game.droneManager
         for drone_id in droneManager.getDroneNames():
             self.leaderboard.insert("", "end", values=(drone_id, 0))
         
@@ -69,7 +77,7 @@ class DroneGUI:
             self.ip_table.insert("", "end", values=(droneNames, ip_address))
         
         self.ip_table.insert("", "end", values=("", ""))
-        self.ip_table.insert("", "end", values=("Mission Planner port", "14550"))
+        self.ip_table.insert("", "end", values=("Mission Planner port", str(PARAM.PORT_LISTERNER)))
 
         self.drone_icon = tk.PhotoImage(file="ressources/droneIcon.png")
         self.drone_icon = self.drone_icon.subsample(self.drone_icon.width() // 40, self.drone_icon.height() // 40)
@@ -85,8 +93,6 @@ class DroneGUI:
         self.limit_west = PARAM.limit_west
         self.limit_east = PARAM.limit_east
 
-        global rhinoLoc
-        rhinoLoc = RhinoLoc(PARAM.rhinoNbr, (self.limit_south, self.limit_west), (self.limit_north, self.limit_east))
         self.show_rhino = True
         
         self.update()
@@ -99,87 +105,81 @@ class DroneGUI:
         return x, y
     
     def update(self):
-        self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.map_image)
-        scores = {}
-        for drone, name in zip(droneManager.getDroneIDs(), droneManager.getDroneNames()):
-            pos = droneManager.get_drone_position(drone)
-            scores[name] = droneManager.get_rhinos_found(drone)
-            x, y = self.convert_to_canvas_coords(pos.lat, pos.lon)
-            self.canvas.create_image(x, y, anchor=tk.CENTER, image=self.drone_icon)
-            self.canvas.create_text(x, y, text=drone, fill="white", font=("HelveticaBold", 10))
+        start = time.perf_counter()
+        self.update_drones()
+        self.update_leaderboard()
+        self.update_rhinos()
+        self.frame_times.append(time.perf_counter() - start)
+        if metrics.enabled:
+            metrics.guiFrameDuration.observeSince(start)
+        if len(self.frame_times) == self.frame_times.maxlen:
+            self.frame_time_label.config(text=f"Frame time: {1e3 * sum(self.frame_times) / len(self.frame_times):.2f} ms")
+            self.frame_times.clear()
+        
+        self.root.after(100, self.update)
 
+    def update_drones(self):
+        for drone, pos in self.game.get_drone_positions().items():
+            x, y = self.convert_to_canvas_coords(pos.lat, pos.lon)
+            if drone not in self.drone_items:
+                icon = self.canvas.create_image(x, y, anchor=tk.CENTER, image=self.drone_icon)
+                label = self.canvas.create_text(x, y, text=drone, fill="white", font=("HelveticaBold", 10))
+                self.drone_items[drone] = (icon, label, (x, y))
+                continue
+            icon, label, (lastX, lastY) = self.drone_items[drone]
+            if abs(x - lastX) >= 0.5 or abs(y - lastY) >= 0.5: # Sub-pixel moves are not redrawn
+                self.canvas.coords(icon, x, y)
+                self.canvas.coords(label, x, y)
+                self.drone_items[drone] = (icon, label, (x, y))
+
+    def update_leaderboard(self):
+        scores = self.game.get_scores()
         scores = {k: v for k, v in sorted(scores.items(), key=lambda item: item[1], reverse=True)}
         for item, droneID, score in zip(self.leaderboard.get_children(), scores.keys(), scores.values()):
-            self.leaderboard.item(item, values=(droneID, score))
-        
-        for pos, found in zip(rhinoLoc.get_rhino_positions(), rhinoLoc.get_rhino_found()):
-            if self.show_rhino or found:
-                rx, ry = self.convert_to_canvas_coords(pos.lat, pos.lon)
-                if found:
-                    self.canvas.create_image(rx, ry, anchor=tk.CENTER, image=self.rhino_icon_green)
-                else:
-                    self.canvas.create_image(rx, ry, anchor=tk.CENTER, image=self.rhino_icon_red)
-        
-        self.root.after(100, self.update)
+            if self.leaderboard_values.get(item) != (droneID, score):
+                self.leaderboard.item(item, values=(droneID, score))
+                self.leaderboard_values[item] = (droneID, score)
+
+    def update_rhinos(self):
+        rhinoLoc = self.game.rhinoLoc
+        canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        positions = rhinoLoc.get_rhino_positions()
+        if self.rhino_drawn is None or self.rhino_drawn[0] is not positions or self.rhino_drawn[1] != canvas_size:
+            # Rhinos were regenerated or the canvas was resized, place all items again
+            x, y = self.convert_to_canvas_coords(positions.lat, positions.lon)
+            while len(self.rhino_items) < len(x):
+                self.rhino_items.append(self.canvas.create_image(0, 0, anchor=tk.CENTER, image=self.rhino_icon_red, state=tk.HIDDEN))
+            for item, rx, ry in zip(self.rhino_items, x, y):
+                self.canvas.coords(item, rx, ry)
+            self.rhino_drawn = (positions, canvas_size)
+            self.rhino_state = np.zeros(len(x), dtype=int)
+
+        found = np.asarray(rhinoLoc.get_rhino_found())
+        state = np.where(found, 2, 1 if self.show_rhino else 0)
+        for i in np.flatnonzero(state != self.rhino_state):
+            if state[i] == 0:
+                self.canvas.itemconfig(self.rhino_items[i], state=tk.HIDDEN)
+            else:
+                image = self.rhino_icon_green if state[i] == 2 else self.rhino_icon_red
+                self.canvas.itemconfig(self.rhino_items[i], image=image, state=tk.NORMAL)
+        self.rhino_state = state
     
     def reset_game(self):
-        for drone in droneManager.getDroneIDs():
-            droneManager.reset_rhinos_found(drone)
-        rhinoLoc.regenerate_rhino_positions()
+        self.game.reset_game()
         
     def toggle_rhino_display(self):
         self.show_rhino = not self.show_rhino
 
     def print_sense_status(self):
-        for drone in droneManager.getDroneIDs():
-            sense_status = rhinoLoc.senseRhino(droneManager.get_drone_position(drone))
+        dronePositions = self.game.get_drone_positions()
+        statuses = self.game.rhinoLoc.senseRhinoBatch(list(dronePositions.values()))
+        for drone, sense_status in zip(dronePositions.keys(), statuses):
             print(f"Drone {drone} sense status: {sense_status}")
-    
-    def run_server(self):
-        server_address = ('', 8080)
-        httpd = HTTPServer(server_address, RequestHandler)
-        print("HTTP server running on port 8080")
-        server_thread = threading.Thread(target=httpd.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
-
-class RequestHandler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        if self.path == "/handshake":
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            response = {"message": "Hello from the Rhino Search server!"}
-            self.wfile.write(json.dumps(response).encode())
-        elif self.path == "/sense":
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data)
-            drone_id = data.get("drone_id")
-            if drone_id:
-                sense_status = rhinoLoc.senseRhino(droneManager.get_drone_position(drone_id))
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                response = {"sense_status": sense_status}
-                if sense_status["state"] == "found":
-                    droneManager.rhinoFound(drone_id)
-                self.wfile.write(json.dumps(response).encode())
-            else:
-                self.send_response(400)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                response = {"error": "Missing drone_id parameter"}
-                self.wfile.write(json.dumps(response).encode())
-        else:
-            self.send_response(404)
-            self.end_headers()
-
 
 
 if __name__ == "__main__":
+    game = GameServer()
+    game.start()
     root = tk.Tk()
-    gui = DroneGUI(root)
-    gui.run_server()
-    root.mainloop()
\ No newline at end of file
+    gui = DroneGUI(root, game)
+    root.mainloop()
@@ -1,8 +1,9 @@
 from drones import DroneManager, SimpleSearch
+from swarmSearch import SwarmSearch
 import param as PARAM
 
 dm = DroneManager()
 dm.createSwarm(PARAM.droneNbr, takeoff=False, listenOnly=False)
         
-searcher = SimpleSearch(dm.drones[1])
-searcher.search()
+searcher = SwarmSearch(dm, SimpleSearch)
+searcher.printReport(searcher.search())
@@ -0,0 +1,106 @@
+import time
+import bisect
+import threading
+
+import param as PARAM
+
+# In-process counters, gauges and histograms of the game server, exposed in the Prometheus text format on
+# GET /metrics (see gameServer.py). Nothing is sent anywhere, a scraper (or curl) pulls them.
+# Instrumented code takes start = metrics.clock() and only records if start is not 0, so a disabled
+# instrumentation costs one function call and no lock.
+
+enabled = PARAM.metricsEnabled
+registry = [] # Every metric created, in creation order
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5) # [s]
+
+def setEnabled(flag):
+    global enabled
+    enabled = flag
+
+def clock():
+    return time.perf_counter() if enabled else 0.0
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelNames=()):
+        self.name = name
+        self.help = help
+        self.labelNames = labelNames
+        self.values = {} # Label values (tuple) -> value
+        self.lock = threading.Lock()
+        registry.append(self)
+
+    def _labels(self, labelValues, extra=()):
+        pairs = list(zip(self.labelNames, labelValues)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            values = {labelValues: list(value) if isinstance(value, list) else value for labelValues, value in self.values.items()}
+        for labelValues, value in sorted(values.items()):
+            lines.extend(self._renderValue(labelValues, value))
+        return lines
+
+    def _renderValue(self, labelValues, value):
+        return [f"{self.name}{self._labels(labelValues)} {value}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labelValues, value=1):
+        with self.lock:
+            self.values[labelValues] = self.values.get(labelValues, 0) + value
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *labelValues):
+        with self.lock:
+            self.values[labelValues] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelNames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelNames)
+        self.buckets = buckets
+
+    def observe(self, value, *labelValues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labelValues)
+            if counts is None:
+                counts = self.values[labelValues] = [0] * (len(self.buckets) + 1) + [0.0] # Per bucket (last one +Inf), then sum
+            counts[index] += 1
+            counts[-1] += value
+
+    def observeSince(self, start, *labelValues):
+        self.observe(time.perf_counter() - start, *labelValues)
+
+    def _renderValue(self, labelValues, counts):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], counts[:-1]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._labels(labelValues, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(labelValues)} {counts[-1]}")
+        lines.append(f"{self.name}_count{self._labels(labelValues)} {cumulative}")
+        return lines
+
+def render():
+    lines = [] if enabled else ["# Metrics are disabled (PARAM.metricsEnabled)"]
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+httpRequests = Counter("rhino_http_requests_total", "HTTP requests handled by the game server", ("endpoint", "code"))
+httpDuration = Histogram("rhino_http_request_duration_seconds", "Time spent handling a POST request, from parsed headers to response written", ("endpoint",))
+senses = Counter("rhino_senses_total", "Senses per drone and result", ("drone", "state"))
+senseDuration = Histogram("rhino_sense_duration_seconds", "Duration of RhinoLoc.senseRhino, including the wait for the herd lock")
+positionDuration = Histogram("rhino_position_read_duration_seconds", "Duration of DroneListener.get_position", ("drone",))
+positionAge = Gauge("rhino_position_age_seconds", "Age of the drone telemetry sample returned by the last DroneListener.get_position", ("drone",))
+guiFrameDuration = Histogram("rhino_gui_frame_duration_seconds", "Duration of a DroneGUI.update frame")
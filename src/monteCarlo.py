@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import threading
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import param as PARAM
+from dataTypes import geoLoc
+from drones import SimpleSearch, LawnmowerSearch, TriangulationSearch, ProbabilisticSearch
+from gameServer import GameServer
+from rhinoLoc import RhinoLoc
+from droneSim import SimDrone, SimDroneManager, SimSenseClient
+
+# Monte Carlo evaluation of search strategies on simulated drones:
+#   python monteCarlo.py --episodes 1000 [--workers N] [--strategies SimpleSearch LawnmowerSearch] [--out results.json]
+# Episode k of every strategy uses the same seed (rhino layout and start point), so strategies are compared on
+# the same games. An episode only depends on its seed, results do not depend on the number of workers.
+
+STRATEGIES = {strategy.__name__: strategy for strategy in (SimpleSearch, LawnmowerSearch, TriangulationSearch, ProbabilisticSearch)}
+METRICS = ("timeToFirstFind", "timeToAllFound", "senses", "distance")
+
+class EpisodeSenseClient(SimSenseClient):
+    # Records the simulated time of every find and ends the search once all rhinos are found
+    def __init__(self, game, drone, rhinoNbr, stopEvent):
+        super().__init__(game)
+        self.drone = drone
+        self.rhinoNbr = rhinoNbr
+        self.stopEvent = stopEvent
+        self.senses = 0
+        self.finds = [] # Simulated time of each find [s]
+
+    def sense(self, droneID):
+        result = super().sense(droneID)
+        self.senses += 1
+        if result["state"] == "found":
+            self.finds.append(self.drone.clock.time())
+            if len(self.finds) >= self.rhinoNbr:
+                self.stopEvent.set()
+        return result
+
+def runEpisode(episode):
+    strategyName, seed, rhinoNbr = episode
+    start = time.time()
+    rng = np.random.default_rng([seed, 0])
+    home = geoLoc(rng.uniform(PARAM.limit_south, PARAM.limit_north), rng.uniform(PARAM.limit_west, PARAM.limit_east))
+    drone = SimDrone(1, home, seed=[seed, 1])
+    drone.take_off(PARAM.takeOffAltitude)
+    droneManager = SimDroneManager(seed)
+    droneManager.drones[1] = drone
+    rhinoLoc = RhinoLoc(rhinoNbr, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east), seed=seed)
+    stopEvent = threading.Event()
+    client = EpisodeSenseClient(GameServer(droneManager, rhinoLoc), drone, rhinoNbr, stopEvent)
+
+    error = None
+    try:
+        STRATEGIES[strategyName](drone, senseClient=client, stopEvent=stopEvent).search()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "strategy": strategyName,
+        "seed": seed,
+        "found": len(client.finds),
+        "timeToFirstFind": client.finds[0] if client.finds else None,
+        "timeToAllFound": client.finds[-1] if len(client.finds) >= rhinoNbr else None,
+        "senses": client.senses,
+        "distance": drone.get_distance_flown(),
+        "time": drone.clock.time(),
+        "wallTime": time.time() - start,
+        "error": error,
+    }
+
+def evaluate(strategies, episodes, rhinoNbr=PARAM.rhinoNbr, seed=0, workers=None):
+    # Returns the episode results ordered by strategy and seed, whatever the number of workers
+    tasks = [(strategy, seed + k, rhinoNbr) for strategy in strategies for k in range(episodes)]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [runEpisode(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(runEpisode, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+
+def summarize(results):
+    # Per strategy and metric: number of episodes with a value, mean and percentiles
+    summary = {}
+    for strategy in dict.fromkeys(r["strategy"] for r in results):
+        episodes = [r for r in results if r["strategy"] == strategy]
+        stats = {"episodes": len(episodes), "allFound": sum(r["timeToAllFound"] is not None for r in episodes), "errors": sum(r["error"] is not None for r in episodes)}
+        for metric in METRICS:
+            values = np.array([r[metric] for r in episodes if r[metric] is not None], dtype=float)
+            if values.size == 0:
+                stats[metric] = {"count": 0}
+                continue
+            p5, p25, p50, p75, p95 = np.percentile(values, [5, 25, 50, 75, 95])
+            stats[metric] = {"count": int(values.size), "mean": float(values.mean()), "std": float(values.std()), "p5": float(p5), "p25": float(p25), "p50": float(p50), "p75": float(p75), "p95": float(p95)}
+        summary[strategy] = stats
+    return summary
+
+def printSummary(summary):
+    units = {"timeToFirstFind": ("min", 60), "timeToAllFound": ("min", 60), "senses": ("", 1), "distance": ("km", 1000)}
+    for strategy, stats in summary.items():
+        print(f"{strategy}: {stats['episodes']} episodes, all rhinos found in {stats['allFound']}, {stats['errors']} errors")
+        for metric in METRICS:
+            s = stats[metric]
+            if s["count"] == 0:
+                print(f"    {metric:16s} -")
+                continue
+            unit, scale = units[metric]
+            values = "  ".join(f"{key} {s[key] / scale:8.1f}" for key in ("mean", "p5", "p25", "p50", "p75", "p95"))
+            print(f"    {metric:16s} {values} {unit}  (n={s['count']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of search strategies on simulated drones")
+    parser.add_argument("--episodes", type=int, default=1000, help="episodes per strategy (default 1000)")
+    parser.add_argument("--strategies", nargs="+", default=["SimpleSearch", "LawnmowerSearch", "TriangulationSearch"], choices=list(STRATEGIES))
+    parser.add_argument("--rhinos", type=int, default=PARAM.rhinoNbr, help=f"rhinos per episode (default {PARAM.rhinoNbr})")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode, episode k uses seed + k")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--out", metavar="FILE", help="save the summary and every episode as JSON")
+    args = parser.parse_args()
+
+    start = time.time()
+    results = evaluate(args.strategies, args.episodes, args.rhinos, args.seed, args.workers)
+    summary = summarize(results)
+    printSummary(summary)
+    print(f"{len(results)} episodes in {time.time() - start:.1f}s with {args.workers} worker(s)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "episodes": results}, f, indent=2)
@@ -3,24 +3,59 @@ limit_north = 0.03749
 limit_south = 0.01852
 limit_west = 36.89164
 limit_east = 36.91846
+geometryMode = "ellipsoid" # "ellipsoid" (exact pymap3d) or "flat" (faster local tangent plane, see dataTypes.flatEarth)
 
 # GAME PARAMETERS
 rhinoNbr = 10
 droneNbr = 5
 sensorRange = 400
 foundThreshold = 50
+proximityMaxIterations = 10 # Maximum number of position estimates flown to during a proximity search
+occupancyCellSize = 25 # Cell size of the ProbabilisticSearch grid [m]
+occupancyFindWeight = 50 # Weight of the probability to find a rhino against the entropy in sensor range
+occupancyMaxSteps = 1000 # Maximum number of waypoints of a ProbabilisticSearch
+rangeSigma = 1 # Assumed standard deviation of the rhino range finder [m], lower bound of the multilateration uncertainty
+coveragePattern = "hex" # Waypoint pattern of the coverage planner, "hex" or "square" (see coveragePlanner.py)
+coverageCacheCellSize = 10 # Cell size of the sensed-coverage raster [m] (see coverageCache.py)
+telemetryRefreshPeriod = 0.1 # Period of the game server drone position refresh [s]
+eventLogPath = "logs/game_{time}.rlog" # Binary event log written by the game server (see eventLog.py), {time} is replaced by the start time. None to disable
+eventLogPositionPeriod = 1 # Period of the drone positions written to the event log [s]
+eventLogFlushPeriod = 0.5 # Period of the event log writes [s]
+telemetryRecordPath = "logs/telemetry_{time}" # Directory of the full rate drone tracks recorded by the game server (see telemetryRecorder.py), None to disable
+telemetryChunkSize = 65536 # Samples by which a drone track file grows, the recorder maps one chunk per drone at a time
+metricsEnabled = True # Record the game server metrics served on /metrics (see metrics.py)
 
 # NETWORK PARAMETERS
 IP = "localhost"
 END_POINT_HANDSHAKE = "handshake"
 END_POINT_SENSE = "sense"
+END_POINT_SENSE_BATCH = "sense_batch"
 
-URL_HANDSHAKE = lambda ip: f"http://{ip}:8080/{END_POINT_HANDSHAKE}"
-URL_SENSE = lambda ip: f"http://{ip}:8080/{END_POINT_SENSE}"
+URL_HANDSHAKE = lambda ip: f"http://{ip}:{PORT_SERVER}/{END_POINT_HANDSHAKE}"
+URL_SENSE = lambda ip: f"http://{ip}:{PORT_SERVER}/{END_POINT_SENSE}"
+URL_SENSE_BATCH = lambda ip: f"http://{ip}:{PORT_SERVER}/{END_POINT_SENSE_BATCH}"
 
+senseTimeout = (2, 5) # Connect and read timeout of sense requests [s]
+senseRetries = 3 # Retries on connection failures only
+sensePoolSize = 10 # Kept-alive connections per server
+senseLatencyHistory = 10000 # Number of recent sense latencies kept for statistics
+
+PORT_SERVER = 8080
 PORT_LISTERNER = 14550
 PORT_MASTER = 5762
 
 # DRONE PARAMETERS
 takeOffAltitude = 100
-takeOffThreshold = 0.01 # Percentage of the takeOffAltitude waited before considering takeoff complete
\ No newline at end of file
+takeOffThreshold = 0.01 # Percentage of the takeOffAltitude waited before considering takeoff complete
+connectTimeout = 60 # Seconds before giving up on connecting to a drone, or on it becoming armable or armed
+takeOffTimeout = 120 # Seconds before giving up on a drone reaching the takeoff altitude
+telemetryTimeout = 0.1 # Seconds a position read waits for the first telemetry sample of a drone, keeps the refresh loop responsive
+swarmWorkers = 10 # Maximum number of drones connected (and taking off) concurrently
+cellWaitPeriod = 1 # Period at which a drone without a free coverage cell checks for cells re-queued by a failed drone [s]
+
+# SIMULATION PARAMETERS (see droneSim.py)
+simSpeed = 10 # Cruise speed of simulated drones [m/s]
+simAcceleration = 2.5 # Acceleration and deceleration of simulated drones [m/s^2]
+simPositionNoise = 0 # Standard deviation of the simulated position readings [m], 0 for exact positions
+simHome = ((limit_north + limit_south) / 2, (limit_east + limit_west) / 2) # Home of the first simulated drone (lat, lon)
+simHomeSpacing = 10 # Simulated drones are lined up eastwards from simHome, like sim_vehicle.py --auto-offset-line 90,10
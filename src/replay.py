@@ -0,0 +1,137 @@
+import time
+import argparse
+import threading
+import numpy as np
+
+import param as PARAM
+import metrics
+from dataTypes import geoLoc, GeoArray
+from drones import DroneManager
+from gameServer import GameServer
+from rhinoLoc import RhinoLoc
+from eventLog import readLog, SENSE, FOUND, POSITION, RESET, RHINO, STATE_NAMES
+
+# Replays a game event log (see eventLog.py) at 1x to 100x, into the game GUI or into /metrics only.
+#   python replay.py logs/game_20250101_120000.rlog --speed 10
+#   python replay.py logs/game_20250101_120000.rlog --speed 100 --headless
+
+class ReplayDrone:
+    # Stands for a drone of the logged game, its position is set by the replay
+    def __init__(self, sysID, position : geoLoc):
+        self.sysID = sysID
+        self.name = f"Drone{sysID}"
+        self.position = position
+        self.rhinosFound = 0
+
+    def get_position(self):
+        return self.position
+
+    def get_rhinos_found(self):
+        return self.rhinosFound
+
+    def reset_rhinos_found(self):
+        self.rhinosFound = 0
+
+class ReplayGame(GameServer):
+    # Game server whose state (drones, herd, scores) is driven by an event log instead of drones and senses,
+    # so that DroneGUI and /metrics work unchanged. speed is the replay speed (1 for real time, 100 for 100x).
+    def __init__(self, path, speed=1, port=PARAM.PORT_SERVER):
+        self.log = readLog(path)
+        self.speed = speed
+        droneManager = DroneManager()
+        positions = self.log[self.log["type"] == POSITION]
+        for droneID in np.unique(positions["drone"]):
+            first = positions[positions["drone"] == droneID][0]
+            droneManager.drones[int(droneID)] = ReplayDrone(int(droneID), self._loc(first))
+        rhinoLoc = RhinoLoc(0, (PARAM.limit_south, PARAM.limit_west), (PARAM.limit_north, PARAM.limit_east))
+        super().__init__(droneManager, rhinoLoc, port, logRequests=False, eventLogPath=None)
+        self.done = threading.Event()
+
+    @staticmethod
+    def _loc(record):
+        return geoLoc(record["lat"], record["lon"], None if np.isnan(record["alt"]) else record["alt"])
+
+    def reset_game(self):
+        pass # The herd is the logged one
+
+    def _apply(self, records, k):
+        # Applies record k, returns the index of the next record
+        record = records[k]
+        kind = record["type"]
+        droneID = int(record["drone"])
+        if kind == POSITION and droneID in self.droneManager.drones:
+            self.droneManager.drones[droneID].position = self._loc(record)
+        elif kind == SENSE:
+            if metrics.enabled:
+                metrics.senses.inc(str(droneID), STATE_NAMES[int(record["state"])])
+        elif kind == FOUND:
+            with self.rhinoLoc.lock:
+                if 0 <= record["rhino"] < self.rhinoLoc.n:
+                    self.rhinoLoc.mark_found(int(record["rhino"]))
+            if droneID in self.droneManager.drones:
+                self.droneManager.rhinoFound(droneID)
+        elif kind == RESET:
+            for drone in self.droneManager.getDroneIDs():
+                self.droneManager.reset_rhinos_found(drone)
+        elif kind == RHINO:
+            # The records of a herd are consecutive, apply them at once
+            end = k
+            while end < len(records) and records[end]["type"] == RHINO:
+                end += 1
+            herd = records[k:end]
+            self.rhinoLoc.set_rhino_positions(GeoArray(herd["lat"], herd["lon"]))
+            return end
+        return k + 1
+
+    def replay(self):
+        records = self.log
+        if len(records) == 0:
+            self.done.set()
+            return
+        t0 = records["time"][0]
+        start = time.time()
+        k = 0
+        while k < len(records) and self.running:
+            delay = (records["time"][k] - t0) / self.speed - (time.time() - start)
+            if delay > 0:
+                time.sleep(min(delay, 0.1))
+                continue
+            k = self._apply(records, k)
+        self.done.set()
+
+    def start(self, serve=True):
+        self.running = True
+        for target in (self._refresh_loop, self.replay):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        if serve:
+            self.run_server()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a game event log")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed, 1 (real time) to 100")
+    parser.add_argument("--headless", action="store_true", help="replay into /metrics only, without the GUI")
+    parser.add_argument("--port", type=int, default=PARAM.PORT_SERVER, help="port of the /metrics end point during the replay")
+    args = parser.parse_args()
+
+    game = ReplayGame(args.path, args.speed, args.port)
+    game.start()
+    try:
+        if args.headless:
+            game.done.wait()
+            print("Replay done, Ctrl+C to stop serving /metrics")
+            while True:
+                time.sleep(1)
+        else:
+            import tkinter as tk
+            from mainGame import DroneGUI
+            root = tk.Tk()
+            gui = DroneGUI(root, game)
+            root.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game.stop()
@@ -6,12 +6,12 @@ if sys.version_info.major == 3 and sys.version_info.minor >= 10:
 
 import time
 import itertools
-import requests
 import numpy as np
 from dronekit import connect, VehicleMode, LocationGlobalRelative
 
 import param as PARAM
 from dataTypes import geoLoc, geoCircle
+from senseClient import get_client
 
 class Drone:
     def __init__(self, sysID, IP, portNumber, takeoff = False):
@@ -101,8 +101,9 @@ class Drone:
 
 
 class ManualSearch:
-    def __init__(self, drone : Drone):
+    def __init__(self, drone : Drone, senseClient=None):
         self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
 
     def search(self, step=PARAM.foundThreshold):
         print(f"@@@@ Manual search\n\tDrone ID: {self.drone.sysID}\n\tPress a,s,d,w to move the drone\n\tPress e to sense\n\tPress q to quit")
@@ -113,7 +114,7 @@ class ManualSearch:
             elif key == "e":
                 print(f"@@@@ Sensing with drone {self.drone.sysID}")
                  # Sense
-                response = requests.post(PARAM.URL_SENSE(drone.IP), json={"drone_id": self.drone.sysID}).json()["sense_status"]
+                response = self.senseClient.sense(self.drone.sysID)
                 print(f"\t\t{response}")
             elif key == "a":
                 print(f"@@@@ Moving drone {self.drone.sysID} west {step}m")
@@ -140,8 +141,9 @@ class ManualSearch:
 
 
 class LawnmowerSearch:
-    def __init__(self, drone : Drone):
+    def __init__(self, drone : Drone, senseClient=None):
         self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
 
     def search(self):
         pNW = geoLoc(PARAM.limit_north, PARAM.limit_west)
@@ -162,15 +164,16 @@ class LawnmowerSearch:
             self.sense()
     
     def sense(self):
-        result =  requests.post(PARAM.URL_SENSE(drone.IP), json={"drone_id": self.drone.sysID}).json()["sense_status"]
+        result = self.senseClient.sense(self.drone.sysID)
         pos = self.drone.get_position()
         if result["state"] == "found":
             self.drone.printInfo(f"Rhino found at {pos}")
 
 
 class TriangulationSearch:
-    def __init__(self, drone : Drone):
+    def __init__(self, drone : Drone, senseClient=None):
         self.drone = drone
+        self.senseClient = senseClient or get_client(drone.IP) # Client used to query the rhino range finder
 
     def search(self):
         pNW = geoLoc(PARAM.limit_north, PARAM.limit_west)
@@ -191,7 +194,7 @@ class TriangulationSearch:
     
     def sense(self):
         # @@@ TASK 7 @@@: Try understanding what this function and the proximitySearch() function do?
-        result =  requests.post(PARAM.URL_SENSE(drone.IP), json={"drone_id": self.drone.sysID}).json()["sense_status"]
+        result = self.senseClient.sense(self.drone.sysID)
         pos = self.drone.get_position()
         if result["state"] == "found":
             self.drone.printInfo(f"Rhino found at {pos}")
@@ -213,7 +216,7 @@ class TriangulationSearch:
         circles = []
         for point in p:
             self.drone.gotoWP(point)
-            rep = requests.post(PARAM.URL_SENSE(drone.IP), json={"drone_id": self.drone.sysID}).json()["sense_status"]
+            rep = self.senseClient.sense(self.drone.sysID)
             if rep["state"] == "found":
                 self.drone.printInfo(f"Rhino found at {point}")
                 self.sense()
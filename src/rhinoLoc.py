@@ -1,53 +1,143 @@
 import random
-from dataTypes import geoLoc
+import threading
+import numpy as np
+import pymap3d as pm
+from dataTypes import geoLoc, GeoArray
 import param as PARAM
+import metrics
+
+class RhinoGrid:
+    # Uniform grid over local ENU coordinates (origin at the map centre) used to answer
+    # "closest unfound rhino within radius" without scanning the whole herd.
+    # Cells are slightly larger than the query radius so that a query only ever needs
+    # the 3x3 block of cells around the sensing position.
+    def __init__(self, cellSize, origin):
+        self.cellSize = cellSize * 1.01 # Margin for the difference between ENU and ECEF distances
+        self.origin = origin
+        self.cells = {}
+        self.ecef = np.empty((0, 3))
+
+    def _cell(self, lat, lon):
+        east, north, _ = pm.geodetic2enu(lat, lon, 0, self.origin[0], self.origin[1], 0)
+        return np.floor(east / self.cellSize).astype(int), np.floor(north / self.cellSize).astype(int)
+
+    def build(self, positions : GeoArray, ecef, found):
+        self.ecef = ecef
+        self.cells = {}
+        indices = np.flatnonzero(~found)
+        if indices.size == 0:
+            return
+        cx, cy = self._cell(positions.lat[indices], positions.lon[indices])
+        order = np.lexsort((cy, cx))
+        cx, cy, indices = cx[order], cy[order], indices[order]
+        splits = np.flatnonzero((np.diff(cx) != 0) | (np.diff(cy) != 0)) + 1
+        for group in np.split(np.arange(indices.size), splits):
+            self.cells[(int(cx[group[0]]), int(cy[group[0]]))] = indices[group]
+
+    def remove(self, index, position : geoLoc):
+        key = tuple(int(c) for c in self._cell(position.lat, position.lon))
+        if key in self.cells:
+            self.cells[key] = self.cells[key][self.cells[key] != index]
+
+    def query(self, position : geoLoc, radius):
+        # radius must not exceed the cell size given at construction
+        cx, cy = self._cell(position.lat, position.lon)
+        cells = [self.cells[key] for key in ((int(cx) + dx, int(cy) + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)) if key in self.cells]
+        if not cells:
+            return float('inf'), None
+        candidates = np.concatenate(cells)
+        if candidates.size == 0:
+            return float('inf'), None
+        origin = np.array(pm.geodetic2ecef(position.lat, position.lon, 0))
+        distances = np.linalg.norm(self.ecef[candidates] - origin, axis=1)
+        closest = int(np.argmin(distances))
+        if distances[closest] > radius:
+            return float('inf'), None
+        return float(distances[closest]), int(candidates[closest])
 
 class RhinoLoc:
-    def __init__(self, n, coord1, coord2):
+    def __init__(self, n, coord1, coord2, seed=None):
         self.n = n
         self.coord1 = coord1
         self.coord2 = coord2
+        self.random = random.Random(seed) # Rhino placement, reproducible when a seed is given
+        self.lock = threading.Lock() # Guards rhino_found so that a rhino can only be claimed once
         self.rhino_positions = self._generate_rhino_positions()
-        self.rhino_found = [False] * self.n
+        self.rhino_ecef = self.rhino_positions.ecef(hzOnly=True)
+        self.rhino_found = np.zeros(self.n, dtype=bool)
+        center = ((PARAM.limit_north + PARAM.limit_south) / 2, (PARAM.limit_east + PARAM.limit_west) / 2)
+        self.index = RhinoGrid(PARAM.sensorRange, center)
+        self.index.build(self.rhino_positions, self.rhino_ecef, self.rhino_found)
 
     def _generate_rhino_positions(self):
-        rhino_positions = []
-        for _ in range(self.n):
-            lat = random.uniform(self.coord1[0], self.coord2[0])
-            lon = random.uniform(self.coord1[1], self.coord2[1])
-            rhino_positions.append(geoLoc(lat, lon))
-        return rhino_positions
+        lat = np.empty(self.n)
+        lon = np.empty(self.n)
+        for i in range(self.n):
+            lat[i] = self.random.uniform(self.coord1[0], self.coord2[0])
+            lon[i] = self.random.uniform(self.coord1[1], self.coord2[1])
+        return GeoArray(lat, lon)
 
     def get_rhino_positions(self):
         return self.rhino_positions
-    
+
     def get_rhino_found(self):
         return self.rhino_found
 
     def regenerate_rhino_positions(self):
-        self.rhino_positions = self._generate_rhino_positions()
-        self.rhino_found = [False] * self.n
+        self.set_rhino_positions(self._generate_rhino_positions())
+
+    def set_rhino_positions(self, positions : GeoArray):
+        # New herd, nothing found yet (e.g. a herd read back from an event log)
+        with self.lock:
+            self.n = len(positions)
+            self.rhino_positions = positions
+            self.rhino_ecef = self.rhino_positions.ecef(hzOnly=True)
+            self.rhino_found = np.zeros(self.n, dtype=bool)
+            self.index.build(self.rhino_positions, self.rhino_ecef, self.rhino_found)
+
+    def mark_found(self, index):
+        self.rhino_found[index] = True
+        self.index.remove(index, self.rhino_positions[index])
 
     def distance_to_closest_rhino(self, position : geoLoc):
-        min_distance = float('inf')
-        min_index = None
-        for i, rhino_position in enumerate(self.rhino_positions):
-            if self.rhino_found[i]: # Ignore found rhinos
-                continue
-            distance = position.distTo(rhino_position, hzOnly=True)
-            if distance < min_distance:
-                min_distance = distance
-                min_index = i
-        print(min_distance, min_index)
-        return min_distance, min_index
-    
-    def senseRhino(self, position : geoLoc):
-        distance, index = self.distance_to_closest_rhino(position)
+        # Full scan over all unfound rhinos, the reference RhinoGrid.query (used by senseRhino) is
+        # benchmarked against in benchmark.py. Distances are the same as geoLoc.distTo(hzOnly=True),
+        # i.e. the norm of the ECEF difference of both points at altitude 0.
+        candidates = np.flatnonzero(~self.rhino_found) # Ignore found rhinos
+        if candidates.size == 0:
+            return float('inf'), None
+        origin = np.array(pm.geodetic2ecef(position.lat, position.lon, 0))
+        distances = np.linalg.norm(self.rhino_ecef[candidates] - origin, axis=1)
+        closest = int(np.argmin(distances))
+        return float(distances[closest]), int(candidates[closest])
+
+    def _senseRhino(self, position : geoLoc):
+        # Sense status and index of the rhino found (None unless found)
+        distance, index = self.index.query(position, PARAM.sensorRange)
         if distance > PARAM.sensorRange:
-            return {"state": "out_of_range", "distance": -1}
+            return {"state": "out_of_range", "distance": -1}, None
         elif distance < PARAM.foundThreshold:
-            self.rhino_found[index] = True
-            return {"state": "found", "distance": distance}
+            self.mark_found(index)
+            return {"state": "found", "distance": distance}, index
         else:
-            return {"state": "in_range", "distance": distance}
-   
\ No newline at end of file
+            return {"state": "in_range", "distance": distance}, None
+
+    def senseRhino(self, position : geoLoc, withIndex=False):
+        # Query and claim happen under the same lock, two concurrent senses can never both find the same rhino
+        start = metrics.clock()
+        with self.lock:
+            result, index = self._senseRhino(position)
+        if start:
+            metrics.senseDuration.observeSince(start)
+        if withIndex:
+            return result, index
+        return result
+
+    def senseRhinoBatch(self, positions, withIndex=False):
+        # All positions are evaluated under a single lock acquisition, i.e. against one consistent
+        # state of the herd. If two positions are close to the same rhino, the first one claims it.
+        with self.lock:
+            results = [self._senseRhino(position) for position in positions]
+        if withIndex:
+            return results
+        return [result for result, _ in results]
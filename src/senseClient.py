@@ -0,0 +1,63 @@
+import time
+import threading
+import collections
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import param as PARAM
+
+class SenseClient:
+    # HTTP client for the game server shared by all search strategies. Connections are pooled and
+    # kept alive, so a sense costs one round-trip instead of a TCP connection setup plus a round-trip.
+    # Only failures to connect are retried: a request that reached the server may already have claimed
+    # a rhino and is never sent twice.
+    def __init__(self, ip=PARAM.IP, timeout=PARAM.senseTimeout, retries=PARAM.senseRetries, poolSize=PARAM.sensePoolSize):
+        self.ip = ip
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, connect=retries, read=0, status=0, other=0, allowed_methods=None, backoff_factor=0.1)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=PARAM.senseLatencyHistory) # Seconds, most recent calls only
+
+    def _post(self, url, payload):
+        start = time.perf_counter()
+        response = self.session.post(url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+        return data
+
+    def handshake(self):
+        return self._post(PARAM.URL_HANDSHAKE(self.ip), {})["message"]
+
+    def sense(self, droneID):
+        return self._post(PARAM.URL_SENSE(self.ip), {"drone_id": droneID})["sense_status"]
+
+    def sense_batch(self, droneIDs):
+        return self._post(PARAM.URL_SENSE_BATCH(self.ip), {"drone_ids": list(droneIDs)})["sense_status"]
+
+    def latency_stats(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+        if latencies.size == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {"count": int(latencies.size), "mean": float(latencies.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(latencies.max())}
+
+    def close(self):
+        self.session.close()
+
+_clients = {}
+_clientsLock = threading.Lock()
+
+def get_client(ip=PARAM.IP):
+    # One client (and thus one connection pool) per server, shared by every strategy of the process
+    with _clientsLock:
+        if ip not in _clients:
+            _clients[ip] = SenseClient(ip)
+        return _clients[ip]
@@ -0,0 +1,169 @@
+import time
+import threading
+import functools
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoLoc, geoRect, GeoArray
+from drones import DroneManager, SimpleSearch, LawnmowerSearch
+from senseClient import get_client
+from coverageCache import CoverageCache
+
+class SwarmSenseClient:
+    # Wraps the sense client shared by all drones of a swarm search. Counts the rhinos found by each
+    # drone and sets stopEvent once rhinoNbr rhinos have been found in total. Times are given by clock.
+    def __init__(self, senseClient, rhinoNbr, stopEvent, clock=time.time):
+        self.senseClient = senseClient
+        self.rhinoNbr = rhinoNbr
+        self.stopEvent = stopEvent
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.start = clock()
+        self.senses = {} # droneID -> number of senses
+        self.finds = [] # (time since start [s], droneID)
+
+    def sense(self, droneID):
+        result = self.senseClient.sense(droneID)
+        with self.lock:
+            self.senses[droneID] = self.senses.get(droneID, 0) + 1
+            if result["state"] == "found":
+                self.finds.append((self.clock() - self.start, droneID))
+                if len(self.finds) >= self.rhinoNbr:
+                    self.stopEvent.set()
+        return result
+
+class SwarmSearch:
+    # Runs one search strategy per drone at the same time, each drone covering its own strip of the map
+    def __init__(self, droneManager : DroneManager, strategy=SimpleSearch, senseClient=None, limits : geoRect = None, rhinoNbr=PARAM.rhinoNbr):
+        self.droneManager = droneManager
+        self.strategy = strategy
+        self.senseClient = senseClient or get_client(PARAM.IP)
+        self.limits = limits or geoRect.fromParam()
+        self.rhinoNbr = rhinoNbr
+
+    def search(self):
+        droneIDs = list(self.droneManager.getDroneIDs())
+        regions = self.limits.split(len(droneIDs))
+        stopEvent = threading.Event()
+        client = SwarmSenseClient(self.senseClient, self.rhinoNbr, stopEvent, self.droneManager.now)
+        errors = {}
+        durations = {}
+
+        def run(droneID, region):
+            start = self.droneManager.now()
+            try:
+                self.strategy(self.droneManager.drones[droneID], senseClient=client, limits=region, stopEvent=stopEvent).search()
+            except Exception as e:
+                errors[droneID] = f"{type(e).__name__}: {e}"
+            durations[droneID] = self.droneManager.now() - start
+
+        self.droneManager.runPerDrone({droneID: functools.partial(run, droneID, region) for droneID, region in zip(droneIDs, regions)})
+
+        report = {
+            "time": self.droneManager.now() - client.start,
+            "timeToAllFound": client.finds[self.rhinoNbr - 1][0] if len(client.finds) >= self.rhinoNbr else None,
+            "found": len(client.finds),
+            "finds": client.finds,
+            "drones": {droneID: {"found": sum(1 for _, d in client.finds if d == droneID), "senses": client.senses.get(droneID, 0), "time": durations.get(droneID), "error": errors.get(droneID)} for droneID in droneIDs},
+        }
+        return report
+
+    def printReport(self, report):
+        for droneID, stats in report["drones"].items():
+            print(f"Drone{droneID}: {stats['found']} rhinos found, {stats['senses']} senses, {stats['time']:.1f}s{'' if stats['error'] is None else ' - ' + stats['error']}")
+        allFound = "not reached" if report["timeToAllFound"] is None else f"{report['timeToAllFound']:.1f}s"
+        print(f"Swarm: {report['found']}/{self.rhinoNbr} rhinos found in {report['time']:.1f}s (all found: {allFound})")
+
+class CellAllocator:
+    # Hands out coverage cells (lawnmower waypoints) one at a time: a drone that becomes free gets the
+    # nearest cell nobody visited or claimed yet. Cells claimed by a drone that drops out are re-queued, so
+    # drones keep asking for cells until all of them are done.
+    FREE, CLAIMED, DONE = 0, 1, 2
+
+    def __init__(self, cells):
+        self.cells = cells if isinstance(cells, GeoArray) else GeoArray.from_locs(cells)
+        self.state = np.full(len(self.cells), self.FREE)
+        self.owner = np.zeros(len(self.cells), dtype=int)
+        self.lock = threading.Lock()
+
+    def next_cell(self, droneID, position : geoLoc):
+        with self.lock:
+            free = np.flatnonzero(self.state == self.FREE)
+            if free.size == 0:
+                return None, None
+            index = int(free[np.argmin(self.cells[free].distTo(position, hzOnly=True))])
+            self.state[index] = self.CLAIMED
+            self.owner[index] = droneID
+            return index, self.cells[index]
+
+    def done(self, index):
+        with self.lock:
+            self.state[index] = self.DONE
+
+    def requeue(self, droneID):
+        with self.lock:
+            claimed = (self.state == self.CLAIMED) & (self.owner == droneID)
+            self.state[claimed] = self.FREE
+            return int(claimed.sum())
+
+    def remaining(self):
+        with self.lock:
+            return int(np.sum(self.state != self.DONE))
+
+class DynamicSwarmSearch(SwarmSearch):
+    # Same interface and report as SwarmSearch, but instead of fixed strips the cells of the full map
+    # lawnmower grid are allocated dynamically, so fast drones keep working while slow ones are busy.
+    # All drones share one coverage cache, cells already cleared by any drone's readings are not flown to.
+    def __init__(self, droneManager : DroneManager, senseClient=None, limits : geoRect = None, rhinoNbr=PARAM.rhinoNbr):
+        super().__init__(droneManager, LawnmowerSearch, senseClient, limits, rhinoNbr)
+
+    def search(self):
+        droneIDs = list(self.droneManager.getDroneIDs())
+        stopEvent = threading.Event()
+        client = SwarmSenseClient(self.senseClient, self.rhinoNbr, stopEvent, self.droneManager.now)
+        cache = CoverageCache(self.limits)
+        allocator = CellAllocator(LawnmowerSearch(self.droneManager.drones[droneIDs[0]], senseClient=client, limits=self.limits).grid())
+        errors = {}
+        durations = {}
+        cellsVisited = {}
+        cellsSkipped = {}
+
+        def run(droneID):
+            start = self.droneManager.now()
+            drone = self.droneManager.drones[droneID]
+            searcher = LawnmowerSearch(drone, senseClient=client, limits=self.limits, stopEvent=stopEvent, cache=cache)
+            cellsVisited[droneID] = 0
+            cellsSkipped[droneID] = 0
+            try:
+                while not stopEvent.is_set():
+                    index, cell = allocator.next_cell(droneID, drone.get_position())
+                    if index is None:
+                        if allocator.remaining() == 0:
+                            break
+                        self.droneManager.sleep(PARAM.cellWaitPeriod, droneID) # Other drones still fly cells, one of them may drop out
+                        continue
+                    if cache.is_covered(cell, PARAM.foundThreshold):
+                        allocator.done(index)
+                        cellsSkipped[droneID] += 1
+                        continue
+                    drone.gotoWP(cell)
+                    searcher.sense()
+                    allocator.done(index)
+                    cellsVisited[droneID] += 1
+            except Exception as e:
+                errors[droneID] = f"{type(e).__name__}: {e}"
+                allocator.requeue(droneID) # Let the other drones take over the cell of this drone
+            durations[droneID] = self.droneManager.now() - start
+
+        self.droneManager.runPerDrone({droneID: functools.partial(run, droneID) for droneID in droneIDs})
+
+        report = {
+            "time": self.droneManager.now() - client.start,
+            "timeToAllFound": client.finds[self.rhinoNbr - 1][0] if len(client.finds) >= self.rhinoNbr else None,
+            "found": len(client.finds),
+            "finds": client.finds,
+            "cellsRemaining": allocator.remaining(),
+            "cellsSkipped": sum(cellsSkipped.values()),
+            "drones": {droneID: {"found": sum(1 for _, d in client.finds if d == droneID), "senses": client.senses.get(droneID, 0), "cells": cellsVisited.get(droneID, 0), "time": durations.get(droneID), "error": errors.get(droneID)} for droneID in droneIDs},
+        }
+        return report
@@ -0,0 +1,152 @@
+import os
+import sys
+import glob
+import struct
+import threading
+import numpy as np
+
+import param as PARAM
+from dataTypes import geoRect, GeoArray
+from coverageCache import CoverageCache
+
+# Full rate GLOBAL_POSITION_INT tracks of every drone, one file per drone: a 64 bytes header holding the number
+# of samples written, followed by fixed-size samples (raw mavlink units). The file grows by chunks of
+# PARAM.telemetryChunkSize samples and the recorder only maps the chunk being written, so its memory stays
+# bounded whatever the length of the game. Readers map the samples written so far (openTrack), zero-copy,
+# while the game is still running.
+#   python telemetryRecorder.py logs/telemetry_20250101_120000     samples, duration and coverage per drone
+
+MAGIC = b"RHINOTEL"
+VERSION = 1
+HEADER = struct.Struct("<8sIII4xQ") # Magic, version, sample size, sysID, number of samples
+HEADER_SIZE = 64
+SAMPLE_DTYPE = np.dtype([("time", "<f8"), ("time_boot_ms", "<u4"), ("lat", "<i4"), ("lon", "<i4"), ("alt", "<i4"), ("relative_alt", "<i4"),
+                         ("vx", "<i2"), ("vy", "<i2"), ("vz", "<i2"), ("hdg", "<u2")]) # time is the reception time [s], see GLOBAL_POSITION_INT for the others
+COUNT_OFFSET = HEADER.size - 8
+
+class TrackFile:
+    # Writer of the track of one drone, samples are appended by a single thread
+    def __init__(self, path, sysID, chunkSize=PARAM.telemetryChunkSize):
+        self.path = path
+        self.chunkSize = chunkSize
+        if os.path.exists(path):
+            readHeader(path) # Appending to an existing track, its samples must have the same layout
+            self.file = open(path, "r+b")
+        else:
+            self.file = open(path, "w+b")
+            self.file.write(HEADER.pack(MAGIC, VERSION, SAMPLE_DTYPE.itemsize, sysID, 0).ljust(HEADER_SIZE, b"\0"))
+            self.file.flush()
+        self.header = np.memmap(self.file, dtype=np.uint64, mode="r+", offset=COUNT_OFFSET, shape=(1,))
+        self.count = int(self.header[0])
+        self.chunk = None
+        self.chunkStart = 0
+
+    def _mapChunk(self):
+        # Maps the chunk holding sample self.count, growing the file if needed. The previous chunk is flushed and
+        # unmapped, its pages leave the recorder's memory.
+        if self.chunk is not None:
+            self.chunk.flush()
+        self.chunkStart = self.count - self.count % self.chunkSize
+        size = HEADER_SIZE + (self.chunkStart + self.chunkSize) * SAMPLE_DTYPE.itemsize
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.truncate(size)
+        self.chunk = np.memmap(self.file, dtype=SAMPLE_DTYPE, mode="r+", offset=HEADER_SIZE + self.chunkStart * SAMPLE_DTYPE.itemsize, shape=(self.chunkSize,))
+
+    def append(self, sample):
+        if self.chunk is None or self.count >= self.chunkStart + self.chunkSize:
+            self._mapChunk()
+        self.chunk[self.count - self.chunkStart] = sample
+        self.count += 1
+        self.header[0] = self.count # Published after the sample itself, readers never see a partial sample
+
+    def close(self):
+        if self.chunk is not None:
+            self.chunk.flush()
+        self.header.flush()
+        self.chunk = None
+        self.header = None
+        self.file.close()
+
+class TelemetryRecorder:
+    # Records the GLOBAL_POSITION_INT messages of all drones into directory/drone<sysID>.track.
+    # record() is called by the MavlinkDemux reader thread for every message.
+    def __init__(self, directory, chunkSize=PARAM.telemetryChunkSize):
+        self.directory = directory
+        self.chunkSize = chunkSize
+        os.makedirs(directory, exist_ok=True)
+        self.tracks = {} # sysID -> TrackFile
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def record(self, sysID, msg, timestamp):
+        with self.lock:
+            if self.closed:
+                return
+            if sysID not in self.tracks:
+                self.tracks[sysID] = TrackFile(trackPath(self.directory, sysID), sysID, self.chunkSize)
+            self.tracks[sysID].append((timestamp, msg.time_boot_ms, msg.lat, msg.lon, msg.alt, msg.relative_alt, msg.vx, msg.vy, msg.vz, msg.hdg))
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            for track in self.tracks.values():
+                track.close()
+            self.tracks = {}
+
+def trackPath(directory, sysID):
+    return os.path.join(directory, f"drone{sysID}.track")
+
+def readHeader(path):
+    with open(path, "rb") as f:
+        magic, version, sampleSize, sysID, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or sampleSize != SAMPLE_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} telemetry track")
+    return sysID, count
+
+def openTrack(path):
+    # Zero-copy, read-only view of the samples written so far. Call again to see the samples written since.
+    _, count = readHeader(path)
+    if count == 0:
+        return np.zeros(0, dtype=SAMPLE_DTYPE)
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+def openTracks(directory):
+    # sysID -> track of every drone recorded in directory
+    tracks = {}
+    for path in glob.glob(os.path.join(directory, "drone*.track")):
+        sysID, _ = readHeader(path)
+        tracks[sysID] = openTrack(path)
+    return dict(sorted(tracks.items()))
+
+def toGeoArray(track):
+    # Positions of a track (altitude relative to home [m])
+    return GeoArray(track["lat"] * 1e-7, track["lon"] * 1e-7, track["relative_alt"] * 1e-3)
+
+def coverage(tracks, radius=PARAM.foundThreshold, limits : geoRect = None, cellSize=PARAM.coverageCacheCellSize):
+    # Fraction of the map that was within radius of at least one drone. Samples closer than one cell to the
+    # previous one kept are skipped, the result does not depend on the telemetry rate.
+    cache = CoverageCache(limits, cellSize)
+    for track in tracks.values():
+        positions = toGeoArray(track)
+        east, north = positions.toENU(cache.origin)
+        lastEast, lastNorth = np.inf, np.inf
+        for k in range(len(positions)):
+            if np.hypot(east[k] - lastEast, north[k] - lastNorth) >= cellSize:
+                cache.clear(positions[k], radius)
+                lastEast, lastNorth = east[k], north[k]
+    return cache.cleared_fraction()
+
+
+if __name__ == "__main__":
+    for directory in sys.argv[1:]:
+        tracks = openTracks(directory)
+        print(f"{directory}: {len(tracks)} drones")
+        for sysID, track in tracks.items():
+            if len(track) < 2:
+                print(f"    Drone{sysID}: {len(track)} samples")
+                continue
+            duration = track["time"][-1] - track["time"][0]
+            positions = toGeoArray(track)
+            distance = float(np.sum(positions[:-1].distTo(positions[1:], hzOnly=True)))
+            print(f"    Drone{sysID}: {len(track)} samples over {duration:.0f}s ({len(track) / max(duration, 1e-9):.1f}Hz), {distance / 1000:.1f}km flown")
+        print(f"    Area within {PARAM.foundThreshold}m of a drone: {coverage(tracks):.1%} of the map")